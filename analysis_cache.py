@@ -0,0 +1,139 @@
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+
+def dhash(image: Image.Image, hash_size: int = 8) -> int:
+    """
+    Compute the difference hash of an image.
+
+    The image is shrunk to (hash_size + 1) x hash_size grayscale pixels and each
+    bit records whether a pixel is brighter than its right neighbour. Resizes,
+    re-encodes and light crops of the same photo land within a few bits of
+    each other.
+    """
+    pixels = np.asarray(
+        image.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR),
+        dtype=np.int16
+    )
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int("".join("1" if bit else "0" for bit in bits), 2)
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    """Count set bits of each uint64 in `values`."""
+    return np.unpackbits(values.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+class AnalysisResultCache:
+    """
+    Persistent cache of analyze responses keyed by perceptual image hash and detector tier.
+
+    A lookup returns the stored response of the closest previously analyzed
+    image within `max_distance` bits (Hamming distance) that was analyzed
+    with the same detector tier, so the same room photo reached through a
+    different pin URL skips YOLO, CLIP and the Firebase upload. Entries live
+    in SQLite and survive restarts; each tier's hashes are also held in a
+    NumPy array for a vectorized nearest-neighbour scan. Web workers share
+    the database, so rows stored by other processes are picked up on lookup.
+    """
+
+    def __init__(self, db_path: str, max_distance: int):
+        self.max_distance = max_distance
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        # WAL and a busy timeout let several web workers read and write the cache at once
+        self._db = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS analysis_results ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "image_hash TEXT NOT NULL, "
+            "detector_tier TEXT, "
+            "response TEXT NOT NULL, "
+            "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+        )
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(analysis_results)")]
+        if "detector_tier" not in columns:
+            # Older caches don't know their tier; their rows are never matched
+            self._db.execute("ALTER TABLE analysis_results ADD COLUMN detector_tier TEXT")
+        self._db.commit()
+        self._lock = threading.Lock()
+
+        # Detector tier -> (row ids, hashes), loaded up to row `_last_id`
+        self._entries: Dict[str, Tuple[List[int], np.ndarray]] = {}
+        self._last_id = 0
+        self._load_new_rows()
+
+        self.hits = 0
+        self.misses = 0
+
+    def _load_new_rows(self):
+        """Add the rows stored since the last load, by this or another process."""
+        rows = self._db.execute(
+            "SELECT id, image_hash, detector_tier FROM analysis_results "
+            "WHERE id > ? AND detector_tier IS NOT NULL ORDER BY id",
+            (self._last_id,)
+        ).fetchall()
+        for row_id, image_hash, detector_tier in rows:
+            self._append(detector_tier, row_id, int(image_hash, 16))
+        if rows:
+            self._last_id = rows[-1][0]
+
+    def _append(self, detector_tier: str, row_id: int, image_hash: int):
+        ids, hashes = self._entries.get(detector_tier, ([], np.array([], dtype=np.uint64)))
+        ids.append(row_id)
+        self._entries[detector_tier] = (ids, np.append(hashes, np.uint64(image_hash)))
+
+    def lookup(self, image_hash: int, detector_tier: str) -> Optional[Dict]:
+        """Return the stored response of the nearest cached image analyzed with `detector_tier`, or None."""
+        with self._lock:
+            self._load_new_rows()
+            ids, hashes = self._entries.get(detector_tier, ([], None))
+            if not ids:
+                self.misses += 1
+                return None
+
+            distances = _popcount(hashes ^ np.uint64(image_hash))
+            best = int(np.argmin(distances))
+            if distances[best] > self.max_distance:
+                self.misses += 1
+                return None
+
+            row = self._db.execute(
+                "SELECT response FROM analysis_results WHERE id = ?", (ids[best],)
+            ).fetchone()
+            self.hits += 1
+            logger.info(f"Analysis cache hit at Hamming distance {distances[best]}")
+            return json.loads(row[0])
+
+    def store(self, image_hash: int, detector_tier: str, response: Dict):
+        """Persist a JSON-serializable analyze response under its image hash and detector tier."""
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO analysis_results (image_hash, detector_tier, response) VALUES (?, ?, ?)",
+                (f"{image_hash:016x}", detector_tier, json.dumps(response))
+            )
+            self._db.commit()
+            # Also picks up rows other processes stored before this one
+            self._load_new_rows()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0,
+            "entries": sum(len(ids) for ids, _ in self._entries.values()),
+            "max_distance": self.max_distance,
+        }
+
+    def close(self):
+        self._db.close()
@@ -1,22 +1,40 @@
 # api/app.py
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from typing import Dict, Any
 from api.models.requests import (
     AnalyzeRequest,
     AnalyzeResponse,
+    BatchAnalyzeRequest,
+    SceneResponse,
     GenerateRequest,
     GenerateResponse,
     GenerateVariationType,
     ErrorResponse
 )
+import json
 import logging
 import traceback
 from pathlib import Path
+from detector_tiers import UnknownDetectorTierError
+from prefork import memory_summary
+from services.room_analysis_service import PinDownloadError
 import os
 
 logger = logging.getLogger(__name__)
 
+# Services reported by /ready
+READINESS_CLIENTS = [
+    "firebase_manager",
+    "http_client",
+    "download_cache",
+    "analysis_cache",
+    "inference_executor",
+    "inference_scheduler",
+]
+# Seconds clients are asked to wait before retrying while the models load
+STARTUP_RETRY_AFTER_SECONDS = 5
+
 class APIError(Exception):
     def __init__(self, message: str, status_code: int = 500, details: Dict = None):
         self.message = message
@@ -24,6 +42,31 @@ class APIError(Exception):
         self.details = details or {}
         super().__init__(self.message)
 
+def _worker_memory() -> Dict[str, Any]:
+    """Unique vs shared resident memory of this worker, where /proc/<pid>/smaps_rollup exists."""
+    try:
+        return {"pid": os.getpid(), **memory_summary(os.getpid())}
+    except OSError:
+        return {}
+
+def _startup(req: Request) -> Dict[str, Any]:
+    return getattr(req.app.state, "startup", {"status": "starting"})
+
+def _ready_services(req: Request) -> Dict[str, Any]:
+    """Return the services, or raise 503 with Retry-After until startup has finished (see /ready)."""
+    startup = _startup(req)
+    services = req.app.state.services
+    if startup["status"] != "ready" or not services:
+        detail = f"Server is not ready: {startup['status']}"
+        if startup.get("error"):
+            detail += f" ({startup['error']})"
+        raise HTTPException(
+            status_code=503,
+            detail=detail,
+            headers={"Retry-After": str(STARTUP_RETRY_AFTER_SECONDS)}
+        )
+    return services
+
 def setup_routes(app: FastAPI):
     """Setup routes for the FastAPI application."""
 
@@ -38,80 +81,128 @@ def setup_routes(app: FastAPI):
             }
         )
 
+    @app.get("/ready")
+    async def readiness_check(req: Request):
+        """
+        Readiness check: which models are warm and which clients are initialized.
+
+        Returns 503 until startup has finished, so load balancers only route
+        analyze requests to workers that can serve them.
+        """
+        startup = _startup(req)
+        model_registry = getattr(req.app.state, "model_registry", None)
+        services = req.app.state.services or {}
+
+        models = {
+            name: "warm" if stats["warmup_seconds"] is not None else "loaded"
+            for name, stats in (model_registry.stats() if model_registry else {}).items()
+        }
+        clients = {}
+        for name in READINESS_CLIENTS:
+            if name not in services:
+                clients[name] = "pending"
+            else:
+                clients[name] = "ready" if services[name] is not None else "disabled"
+
+        ready = startup["status"] == "ready"
+        return JSONResponse(
+            status_code=200 if ready else 503,
+            content={
+                "ready": ready,
+                "status": startup["status"],
+                "error": startup.get("error"),
+                "startup_seconds": startup.get("seconds"),
+                "models": models,
+                "clients": clients
+            }
+        )
+
     @app.post("/api/analyze", response_model=AnalyzeResponse)
     async def analyze_pinterest_image(request: AnalyzeRequest, req: Request):
         """Analyze a Pinterest image and return room details."""
         try:
-            services = req.app.state.services
-            if not services:
-                raise HTTPException(status_code=500, detail="Services not initialized")
-
-            # 1. Download image
-            image_path = "downloaded_image.jpg"
-            logger.info(f"Downloading image from {request.pinterest_url}")
-            
-            download_result = services['download_pinterest_image'](
+            services = _ready_services(req)
+
+            return await services['room_analysis_service'].analyze_pin(
                 request.pinterest_url,
-                image_path
+                detector_tier=request.detector_tier,
+                latency_budget_ms=request.latency_budget_ms
             )
-            if not download_result:
-                raise HTTPException(status_code=400, detail="Failed to download Pinterest image")
-
-            # 2. Analyze room
-            room_style, room_type = services['get_clip_embeddings'](image_path)
-            detected_objects = services['analyze_room_objects'](image_path)
-            
-            # 3. Clean detected objects (convert numpy types to Python types)
-            cleaned_objects = []
-            for obj in detected_objects:
-                cleaned_obj = {
-                    "class_name": obj["class_name"],
-                    "confidence": float(obj["confidence"]),
-                    "coordinates": [float(x) for x in obj["bounding_box"]],
-                    "attributes": obj["attributes"]
-                }
-                cleaned_objects.append(cleaned_obj)
 
-            # 4. Create room object
-            room = services['create_room_from_analysis'](
-                cleaned_objects,
-                room_style,
-                room_type
-            )
+        except HTTPException:
+            raise
+        except (PinDownloadError, UnknownDetectorTierError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            logger.error(f"Error in analyze_pinterest_image: {str(e)}")
+            raise HTTPException(status_code=500, detail=str(e))
 
-            # 5. Upload to Firebase
-            doc_id, public_url = await services['firebase_manager'].upload_room(
-                image_path=image_path,
-                metadata=room.dict()
-            )
+    @app.post("/api/analyze/stream")
+    async def analyze_pinterest_image_stream(request: AnalyzeRequest, req: Request):
+        """
+        Analyze a Pinterest image as server-sent events.
 
-            # 6. Update room with ID and URL
-            room.id = doc_id
-            room.image_url = public_url
+        Emits a `scene` event (SceneResponse) as soon as the room style and type
+        are known, then a `room` event (AnalyzeResponse) with the detected
+        objects and stored room. Failures are reported as an `error` event.
+        """
+        service = _ready_services(req)['room_analysis_service']
+        try:
+            service.tier_selector.choose(request.detector_tier)
+        except UnknownDetectorTierError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-            # 7. Cleanup downloaded image
-            if os.path.exists(image_path):
-                os.remove(image_path)
+        async def stream_events():
+            try:
+                async for result in service.analyze_pin_progressive(
+                    request.pinterest_url,
+                    detector_tier=request.detector_tier,
+                    latency_budget_ms=request.latency_budget_ms
+                ):
+                    event = "scene" if isinstance(result, SceneResponse) else "room"
+                    yield f"event: {event}\ndata: {result.model_dump_json()}\n\n"
+            except Exception as e:
+                logger.error(f"Error in analyze_pinterest_image_stream: {str(e)}")
+                status_code = 400 if isinstance(e, PinDownloadError) else 500
+                error = json.dumps({"detail": str(e), "status_code": status_code})
+                yield f"event: error\ndata: {error}\n\n"
 
-            return AnalyzeResponse(
-                room=room,
-                public_url=public_url,
-                detected_objects=cleaned_objects
-            )
+        return StreamingResponse(
+            stream_events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
 
-        except Exception as e:
-            logger.error(f"Error in analyze_pinterest_image: {str(e)}")
-            raise HTTPException(status_code=500, detail=str(e))
+    @app.post("/api/analyze/batch")
+    async def analyze_pinterest_images(request: BatchAnalyzeRequest, req: Request):
+        """
+        Analyze many Pinterest images, e.g. a whole board.
+
+        Streams one JSON line per pin (BatchAnalyzeItem) as soon as it completes,
+        in completion order. A failed pin yields an item with `error` set.
+        """
+        service = _ready_services(req)['room_analysis_service']
+        try:
+            service.tier_selector.choose(request.detector_tier)
+        except UnknownDetectorTierError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        async def stream_results():
+            async for item in service.analyze_pins(
+                request.pinterest_urls,
+                detector_tier=request.detector_tier,
+                latency_budget_ms=request.latency_budget_ms
+            ):
+                yield item.model_dump_json() + "\n"
+
+        return StreamingResponse(stream_results(), media_type="application/x-ndjson")
 
     @app.post("/api/generate", response_model=GenerateResponse)
     async def generate_variation(request: GenerateRequest, req: Request):
         """Generate a variation of the analyzed room."""
         logger.info(f"in generate_variation: {request}")
+        services = _ready_services(req)
         try:
-            services = req.app.state.services
-            if not services:
-                raise APIError("Services not initialized", status_code=500)
-
             try:
                 if request.variation_type == GenerateVariationType.SLIGHT:
                     similar_rooms = await services['similar_service'].generate_img2img_from_pinterest(
@@ -163,10 +254,27 @@ def setup_routes(app: FastAPI):
     async def health_check(req: Request):
         """Health check endpoint."""
         services = req.app.state.services
+        model_registry = (services or {}).get('model_registry')
+        scheduler = (services or {}).get('inference_scheduler')
+        executor = (services or {}).get('inference_executor')
+        tier_selector = (services or {}).get('tier_selector')
+        download_cache = (services or {}).get('download_cache')
+        analysis_cache = (services or {}).get('analysis_cache')
+        room_analysis_service = (services or {}).get('room_analysis_service')
         return {
             "status": "healthy" if services else "services not initialized",
             "version": "1.0.0",
             "services_status": {
                 name: "initialized" for name in (services or {}).keys()
-            }
+            },
+            "models": model_registry.stats() if model_registry else {},
+            "inference": {
+                "executor": executor.stats() if executor else {},
+                "batching": scheduler.metrics() if scheduler else {},
+                "detector_tiers": tier_selector.stats() if tier_selector else {}
+            },
+            "download_cache": download_cache.stats() if download_cache else {},
+            "analysis_cache": analysis_cache.stats() if analysis_cache else {},
+            "analysis": room_analysis_service.stats() if room_analysis_service else {},
+            "memory": _worker_memory()
         }
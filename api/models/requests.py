@@ -1,8 +1,9 @@
 # backend/api/models/requests.py
-from pydantic import BaseModel, ConfigDict, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from typing import List, Optional, Dict, Any
 from models.room import Room, RoomType, RoomStyle, RoomMetadata
 from enum import Enum
+from config import config
 import numpy as np
 
 class GenerateVariationType(str, Enum):
@@ -11,11 +12,17 @@ class GenerateVariationType(str, Enum):
 
 class AnalyzeRequest(BaseModel):
     pinterest_url: str
+    # Detector tier to run; if omitted the server picks one within latency_budget_ms
+    detector_tier: Optional[str] = None
+    latency_budget_ms: Optional[float] = Field(default=None, gt=0)
 
 class AnalyzeResponse(BaseModel):
     room: Room
     public_url: str
     detected_objects: List[Dict]
+    detector_tier: Optional[str] = None
+    timings: Optional[Dict[str, float]] = None
+    cached: bool = False
     
     model_config = ConfigDict(
         arbitrary_types_allowed=True,
@@ -26,6 +33,22 @@ class AnalyzeResponse(BaseModel):
         }
     )
 
+class SceneResponse(BaseModel):
+    room_style: RoomStyle
+    room_type: RoomType
+    timings: Optional[Dict[str, float]] = None
+
+class BatchAnalyzeRequest(BaseModel):
+    pinterest_urls: List[str] = Field(min_length=1, max_length=config.BATCH_MAX_URLS)
+    detector_tier: Optional[str] = None
+    latency_budget_ms: Optional[float] = Field(default=None, gt=0)
+
+class BatchAnalyzeItem(BaseModel):
+    index: int
+    pinterest_url: str
+    result: Optional[AnalyzeResponse] = None
+    error: Optional[str] = None
+
 class GenerateRequest(BaseModel):
     variation_type: GenerateVariationType
     variation_parameters: Optional[Dict] = None
@@ -0,0 +1,165 @@
+"""
+Sweep CPU inference settings and write the fastest profile for main.py to apply at startup.
+
+For each combination of torch intra-op threads, inter-op threads, executor
+workers and micro-batch size, the scene (CLIP) and object (YOLO + CLIP
+attributes) batch functions run over the reference images from a thread pool,
+as the inference scheduler runs them. Throughput and p95 batch latency of
+each path are recorded. The profile with the highest combined throughput
+whose p95 stays under --max-p95-ms is written to INFERENCE_PROFILE_PATH.
+
+    python autotune.py [--threads 1 2 4] [--workers 1 2] [--batch-sizes 1 4 8] [--interop 1 2]
+
+Inter-op threads can only be set once per process, so each inter-op value
+is measured in its own process.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from benchmark_support import print_worker_result, reference_image_paths, run_worker
+from config import config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _powers_of_two_up_to(limit: int) -> List[int]:
+    values, value = [], 1
+    while value <= limit:
+        values.append(value)
+        value *= 2
+    return values
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[int(fraction * (len(values) - 1))]
+
+
+def measure_path(batch_fn: Callable, images, workers: int, batch_size: int) -> Dict[str, float]:
+    """Run `batch_fn` over `images` in batches from `workers` threads; return throughput and p95."""
+    batches = [images[start:start + batch_size] for start in range(0, len(images), batch_size)]
+
+    def run(batch):
+        start = time.perf_counter()
+        batch_fn(batch)
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(run, batches[:workers]))  # Warmup each worker at this batch size
+        start = time.perf_counter()
+        latencies = list(pool.map(run, batches))
+        elapsed = time.perf_counter() - start
+    return {
+        "images_per_second": round(len(images) / elapsed, 2),
+        "p95_ms": round(_percentile(latencies, 0.95), 1),
+    }
+
+
+def sweep(interop_threads: int, threads: List[int], workers: List[int], batch_sizes: List[int], image_count: int):
+    """Measure every (threads, workers, batch size) combination in this process."""
+    import torch
+    from clip import classify_room_images
+    from decoded_image import DecodedImage
+    from inference_executor import load_analysis_models
+    from room_object_analysis import analyze_room_images
+
+    torch.set_num_interop_threads(interop_threads)
+    registry = load_analysis_models()
+    reference = [DecodedImage.from_path(path).pil for path in reference_image_paths()]
+    images = [reference[i % len(reference)] for i in range(image_count)]
+    cpus = os.cpu_count() or 1
+
+    results = []
+    for thread_count in threads:
+        torch.set_num_threads(thread_count)
+        for worker_count in workers:
+            if thread_count * worker_count > cpus:
+                continue  # Oversubscribed: threads would only contend
+            for batch_size in batch_sizes:
+                scene = measure_path(
+                    lambda batch: classify_room_images(batch, registry), images, worker_count, batch_size
+                )
+                objects = measure_path(
+                    lambda batch: analyze_room_images(batch, registry), images, worker_count, batch_size
+                )
+                result = {
+                    "torch_threads": thread_count,
+                    "interop_threads": interop_threads,
+                    "executor_workers": worker_count,
+                    "max_batch_size": batch_size,
+                    "scene": scene,
+                    "objects": objects,
+                    # Images per second when every image goes through both paths
+                    "images_per_second": round(
+                        1 / (1 / scene["images_per_second"] + 1 / objects["images_per_second"]), 2
+                    ),
+                    "p95_ms": max(scene["p95_ms"], objects["p95_ms"]),
+                }
+                logger.info(f"{result}")
+                results.append(result)
+    return results
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, nargs="+", default=_powers_of_two_up_to(cpus))
+    parser.add_argument("--interop", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--workers", type=int, nargs="+", default=[w for w in (1, 2, 4) if w <= cpus])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--images", type=int, default=16, help="Images per measurement, cycled from the reference set")
+    parser.add_argument("--max-p95-ms", type=float, help="Only consider profiles with a p95 batch latency under this")
+    parser.add_argument("--output", default=config.INFERENCE_PROFILE_PATH)
+    parser.add_argument("--sweep-interop", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.sweep_interop:
+        print_worker_result(sweep, args.sweep_interop, args.threads, args.workers, args.batch_sizes, args.images)
+        return
+
+    results = []
+    for interop_threads in args.interop:
+        logger.info(f"Sweeping with {interop_threads} inter-op threads")
+        command = [
+            sys.executable, __file__, "--sweep-interop", str(interop_threads),
+            "--threads", *map(str, args.threads),
+            "--workers", *map(str, args.workers),
+            "--batch-sizes", *map(str, args.batch_sizes),
+            "--images", str(args.images),
+        ]
+        results.extend(run_worker(command))
+
+    candidates = [r for r in results if args.max_p95_ms is None or r["p95_ms"] <= args.max_p95_ms]
+    if not candidates:
+        raise SystemExit(f"No configuration met a p95 of {args.max_p95_ms} ms")
+    best = max(candidates, key=lambda r: r["images_per_second"])
+
+    profile = {
+        "torch_threads": best["torch_threads"],
+        "interop_threads": best["interop_threads"],
+        "executor_workers": best["executor_workers"],
+        "max_batch_size": best["max_batch_size"],
+        "measured": {key: best[key] for key in ("scene", "objects", "images_per_second", "p95_ms")},
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "cpu_count": cpus,
+        "sweep": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(profile, f, indent=2)
+
+    print(f"\n{'threads':>7} {'interop':>7} {'workers':>7} {'batch':>5} {'img/s':>7} {'p95 ms':>8}")
+    for r in sorted(results, key=lambda r: -r["images_per_second"])[:10]:
+        print(f"{r['torch_threads']:>7} {r['interop_threads']:>7} {r['executor_workers']:>7} "
+              f"{r['max_batch_size']:>5} {r['images_per_second']:>7.2f} {r['p95_ms']:>8.1f}")
+    logger.info(f"Wrote best profile to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
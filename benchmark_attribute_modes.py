@@ -0,0 +1,89 @@
+"""
+Compare the crop and roi attribute modes on the sample rooms.
+
+All modes classify the same filtered YOLO detections. Latency is the median
+time to embed all objects of an image. There are no attribute labels for the
+sample rooms, so accuracy is measured as agreement with crop mode (crops cut
+from the ATTRIBUTE_CROP_MAX_SIDE decode): how often another mode picks the
+same top label, and how often crop mode's label is in its top-k. The other
+modes are roi, and crop_capped, which cuts the crops from the
+IMAGE_DECODE_MAX_SIDE image the detector sees, to show what the cap costs.
+
+    python benchmark_attribute_modes.py [--repeats 5]
+"""
+import argparse
+import logging
+import statistics
+import time
+
+from benchmark_support import reference_image_paths
+from config import config
+from decoded_image import DecodedImage
+from model_registry import get_registry
+from room_object_analysis import ATTRIBUTE_LABELS, classify_object_attributes, encode_objects, filter_detections
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MODES = ["crop", "crop_capped", "roi"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    registry = get_registry().load()
+    registry.warmup()
+
+    latencies = {mode: [] for mode in MODES}
+    matches = {mode: {head: 0 for head in ATTRIBUTE_LABELS} for mode in MODES[1:]}
+    in_top_k = {mode: {head: 0 for head in ATTRIBUTE_LABELS} for mode in MODES[1:]}
+    total_objects = 0
+
+    for path in reference_image_paths():
+        decoded = DecodedImage.from_path(path, detail_side=config.ATTRIBUTE_CROP_MAX_SIDE)
+        result = registry.yolo(decoded.pil, verbose=False)[0]
+        objects = filter_detections(result.boxes.data.cpu().numpy(), result.names, decoded.size)
+        if not len(objects):
+            logger.info(f"{path}: no objects kept, skipping")
+            continue
+
+        attributes = {}
+        for mode in MODES:
+            # A bare PIL image has no higher-resolution detail to crop from
+            image = decoded.pil if mode == "crop_capped" else decoded
+            attribute_mode = "roi" if mode == "roi" else "crop"
+            encode_objects([image], [objects], registry, attribute_mode)  # Warmup
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                features = encode_objects([image], [objects], registry, attribute_mode)
+                latencies[mode].append((time.perf_counter() - start) * 1000)
+            attributes[mode] = classify_object_attributes(features, registry)
+
+        for mode in MODES[1:]:
+            for crop_attributes, mode_attributes in zip(attributes["crop"], attributes[mode]):
+                for head in ATTRIBUTE_LABELS:
+                    reference = crop_attributes[head]["label"]
+                    matches[mode][head] += mode_attributes[head]["label"] == reference
+                    in_top_k[mode][head] += reference in [
+                        entry["label"] for entry in mode_attributes[head]["top_k"]
+                    ]
+        total_objects += len(objects)
+        logger.info(f"{path}: {len(objects)} objects")
+
+    if not total_objects:
+        raise SystemExit("No objects detected in the sample images")
+
+    print(f"\n{total_objects} objects, {args.repeats} repeats per image")
+    for mode in MODES:
+        print(f"{mode:>11}: median {statistics.median(latencies[mode]):.1f} ms per image")
+    for mode in MODES[1:]:
+        print(f"\n{mode} agreement with crop (top-1 / crop label in {mode} top-{config.ATTRIBUTE_TOP_K}):")
+        for head in ATTRIBUTE_LABELS:
+            print(f"{head:>9}: {matches[mode][head] / total_objects:.0%} / "
+                  f"{in_top_k[mode][head] / total_objects:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Measure each detector tier and write the profile the server uses to pick tiers.
+
+Latency is the median time of one YOLO forward pass on each sample image.
+mAP needs labeled images whose classes are the detector's own: each tier is
+scored on the first of the --data datasets whose class names match its
+model's, and the dataset is recorded as the tier's `map_dataset`. The
+fine-tuning dataset (`dataset/dataset.yaml`, see finetune_yolo_home_decor.py)
+only matches the home_decor tier; pass a COCO-labeled dataset (such as a
+local copy of ultralytics' coco128.yaml) to score the stock tiers. Tiers no
+dataset matches get a null mAP and are ranked by QUALITY_ORDER instead.
+
+    python benchmark_detector_tiers.py [--repeats 10] [--data dataset/dataset.yaml coco128/coco128.yaml]
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import time
+from datetime import datetime
+from typing import List, Optional
+
+import yaml
+from ultralytics import YOLO
+
+from benchmark_support import reference_image_paths
+from config import config
+from decoded_image import DecodedImage
+from detector_tiers import detector_tiers
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def measure_latency(detector: YOLO, images, repeats: int) -> dict:
+    """Median and 95th percentile milliseconds per image over `repeats` runs."""
+    detector(images[0], verbose=False)  # Warmup
+    timings = []
+    for _ in range(repeats):
+        for image in images:
+            start = time.perf_counter()
+            detector(image, verbose=False)
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "latency_ms": round(statistics.median(timings), 1),
+        "p95_ms": round(timings[int(0.95 * (len(timings) - 1))], 1),
+    }
+
+
+def dataset_class_names(data: str) -> Optional[List[str]]:
+    """Class names of a YOLO dataset yaml, in index order, or None if it is missing."""
+    if not os.path.exists(data):
+        return None
+    with open(data) as f:
+        names = yaml.safe_load(f).get("names") or []
+    if isinstance(names, dict):
+        names = [names[index] for index in sorted(names)]
+    return list(names)
+
+
+def measure_map(detector: YOLO, datasets: List[str]) -> dict:
+    """mAP on the first dataset labeled with the detector's classes; null if none is."""
+    model_names = [detector.names[index] for index in sorted(detector.names)]
+    for data in datasets:
+        if dataset_class_names(data) != model_names:
+            continue
+        metrics = detector.val(data=data, imgsz=config.IMAGE_DECODE_MAX_SIDE, verbose=False)
+        return {
+            "map50": round(float(metrics.box.map50), 4),
+            "map50_95": round(float(metrics.box.map), 4),
+            "map_dataset": data,
+        }
+    return {"map50": None, "map50_95": None, "map_dataset": None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument(
+        "--data", nargs="+", default=["dataset/dataset.yaml"],
+        help="Labeled YOLO datasets for mAP; each tier uses the first whose classes match its own"
+    )
+    parser.add_argument("--output", default=config.DETECTOR_PROFILE_PATH)
+    args = parser.parse_args()
+
+    paths = reference_image_paths()
+    images = [DecodedImage.from_path(path).pil for path in paths]
+
+    tiers = {}
+    for tier, weights in detector_tiers().items():
+        logger.info(f"Benchmarking {tier} ({weights})")
+        detector = YOLO(weights)
+        tiers[tier] = {
+            "weights": weights,
+            **measure_latency(detector, images, args.repeats),
+            **measure_map(detector, args.data),
+        }
+        logger.info(f"{tier}: {tiers[tier]}")
+
+    profile = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "images": paths,
+        "image_max_side": config.IMAGE_DECODE_MAX_SIDE,
+        "tiers": tiers,
+    }
+    with open(args.output, "w") as f:
+        json.dump(profile, f, indent=2)
+    logger.info(f"Wrote detector profile to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
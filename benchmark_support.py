@@ -0,0 +1,36 @@
+"""Helpers shared by the benchmark and parity-check scripts."""
+import json
+import os
+import subprocess
+import sys
+from contextlib import redirect_stdout
+from typing import Any, Callable, List
+
+# Sample room photos every benchmark and parity check runs on
+REFERENCE_IMAGES = ["living_room.jpg", "neo_classical_dining.jpg", "downloaded_image.png"]
+
+
+def reference_image_paths() -> List[str]:
+    """The reference images present in the working directory; exits if there are none."""
+    paths = [path for path in REFERENCE_IMAGES if os.path.exists(path)]
+    if not paths:
+        raise SystemExit(f"None of the reference images {REFERENCE_IMAGES} were found")
+    return paths
+
+
+def print_worker_result(fn: Callable[..., Any], *args, **kwargs):
+    """
+    Run `fn` in a worker process and print its JSON-serializable result as stdout's only output.
+
+    The analysis code prints its predictions; those go to stderr instead so
+    the parent can parse stdout with `run_worker`.
+    """
+    with redirect_stdout(sys.stderr):
+        result = fn(*args, **kwargs)
+    print(json.dumps(result))
+
+
+def run_worker(command: List[str]) -> Any:
+    """Run a worker subprocess that reports with `print_worker_result` and return its result."""
+    output = subprocess.run(command, check=True, stdout=subprocess.PIPE, text=True).stdout
+    return json.loads(output)
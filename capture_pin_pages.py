@@ -0,0 +1,80 @@
+"""
+Capture real Pinterest pin pages as fixtures for test_pin_extractor.py.
+
+    python capture_pin_pages.py https://www.pinterest.com/pin/<id>/ [...]
+
+Each page is fetched with the server's user agent and trimmed to what the
+scanner reads: scripts other than the embedded pin JSON, styles, links and
+comments are dropped, everything else is kept as served. The page is saved to
+fixtures/pin_pages/captured/pin_<id>.html, and its URL, capture time and the
+image URL the scanner extracts from it are recorded in sources.json. Open
+that image next to the pin in a browser and check it is the pin's photo
+before committing the fixture.
+"""
+import argparse
+import json
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from config import config
+from download_cache import normalize_pin_key
+from pin_extractor import extract_image_url_from_html, pin_image_target_side
+
+CAPTURED_DIR = Path(__file__).parent / "fixtures" / "pin_pages" / "captured"
+SOURCES_PATH = CAPTURED_DIR / "sources.json"
+_SCRIPT = re.compile(r"<script\b[^>]*>.*?</script>", re.I | re.S)
+_DROPPED = [
+    re.compile(r"<style\b[^>]*>.*?</style>", re.I | re.S),
+    re.compile(r"<link\b[^>]*>", re.I),
+    re.compile(r"<!--.*?-->", re.S),
+]
+
+
+def trim_page(html: str) -> str:
+    """Drop the markup the scanner never reads, keeping meta tags, images and the pin JSON."""
+    html = _SCRIPT.sub(lambda match: match.group(0) if "__PWS_" in match.group(0)[:200] else "", html)
+    for pattern in _DROPPED:
+        html = pattern.sub("", html)
+    return re.sub(r"\n\s*\n+", "\n", html)
+
+
+def capture(pin_url: str, client: httpx.Client) -> dict:
+    response = client.get(pin_url)
+    response.raise_for_status()
+    html = trim_page(response.text)
+    target_side = pin_image_target_side()
+    name = f"{normalize_pin_key(pin_url).replace(':', '_')}.html"
+    (CAPTURED_DIR / name).write_text(html)
+    return {
+        name: {
+            "url": pin_url,
+            "final_url": str(response.url),
+            "captured_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "user_agent": config.HTTP_USER_AGENT,
+            "target_side": target_side,
+            "image_url": extract_image_url_from_html(html, target_side),
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pin_urls", nargs="+")
+    args = parser.parse_args()
+
+    CAPTURED_DIR.mkdir(parents=True, exist_ok=True)
+    sources = json.loads(SOURCES_PATH.read_text()) if SOURCES_PATH.exists() else {}
+    with httpx.Client(follow_redirects=True, headers={"User-Agent": config.HTTP_USER_AGENT}) as client:
+        for pin_url in args.pin_urls:
+            entry = capture(pin_url, client)
+            sources.update(entry)
+            for name, source in entry.items():
+                print(f"{name}: {source['image_url']}")
+    SOURCES_PATH.write_text(json.dumps(sources, indent=2, sort_keys=True) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Check that reduced-precision CLIP still predicts what fp32 does, and what it costs.
+
+Each precision runs in its own process so resident memory is measured in
+isolation. On the reference images, room style, room type and the top
+style/material/color of every detected object are compared with fp32.
+Per-image CLIP latency (scene classification plus object attributes) and
+resident memory after warmup are reported per precision.
+
+Exits non-zero if a room style or type differs from fp32, or if object
+attribute agreement falls below --min-attribute-agreement.
+
+    python check_clip_precision.py [--precisions int8 bf16] [--repeats 5]
+"""
+import argparse
+import logging
+import statistics
+import sys
+import time
+
+from benchmark_support import print_worker_result, reference_image_paths, run_worker
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def run_precision(precision: str, repeats: int) -> dict:
+    """Predict on the reference images with one precision, in this process."""
+    from clip import classify_room_images
+    from decoded_image import DecodedImage
+    from model_registry import ModelRegistry, _rss_bytes
+    from room_object_analysis import ATTRIBUTE_LABELS, classify_object_attributes, encode_objects, filter_detections
+
+    registry = ModelRegistry(clip_precision=precision).load()
+    registry.warmup()
+
+    predictions, latencies = {}, []
+    for path in reference_image_paths():
+        image = DecodedImage.from_path(path).pil
+        result = registry.yolo(image, verbose=False)[0]
+        objects = filter_detections(result.boxes.data.cpu().numpy(), result.names, image.size)
+
+        for _ in range(repeats):
+            start = time.perf_counter()
+            (room_style, room_type), = classify_room_images([image], registry)
+            attributes = classify_object_attributes(encode_objects([image], [objects], registry), registry)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        predictions[path] = {
+            "room_style": room_style.value,
+            "room_type": room_type.value,
+            "objects": [{head: obj[head]["label"] for head in ATTRIBUTE_LABELS} for obj in attributes],
+        }
+
+    return {
+        "precision": registry.clip_precision,
+        "latency_ms": round(statistics.median(latencies), 1),
+        "rss_mb": round(_rss_bytes() / 2**20, 1),
+        "clip": registry.stats()["clip"],
+        "predictions": predictions,
+    }
+
+
+def compare(reference: dict, candidate: dict) -> dict:
+    scene_mismatches = []
+    attribute_matches = attribute_total = 0
+    for path, expected in reference["predictions"].items():
+        actual = candidate["predictions"][path]
+        for field in ("room_style", "room_type"):
+            if actual[field] != expected[field]:
+                scene_mismatches.append(f"{path} {field}: {expected[field]} -> {actual[field]}")
+        for expected_obj, actual_obj in zip(expected["objects"], actual["objects"]):
+            for head, label in expected_obj.items():
+                attribute_matches += actual_obj[head] == label
+                attribute_total += 1
+    return {
+        "scene_mismatches": scene_mismatches,
+        "attribute_agreement": attribute_matches / attribute_total if attribute_total else 1.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--precisions", nargs="+", default=["int8", "bf16"])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--min-attribute-agreement", type=float, default=0.9)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print_worker_result(run_precision, args.worker, args.repeats)
+        return
+
+    results = {}
+    for precision in ["fp32", *args.precisions]:
+        logger.info(f"Running CLIP in {precision}")
+        results[precision] = run_worker(
+            [sys.executable, __file__, "--worker", precision, "--repeats", str(args.repeats)]
+        )
+
+    reference = results["fp32"]
+    failed = False
+    print(f"\n{'mode':>6} {'ran as':>6} {'latency/image':>14} {'RSS':>9} {'scene':>6} {'attributes':>11}")
+    for precision, result in results.items():
+        parity = compare(reference, result)
+        ok = not parity["scene_mismatches"] and parity["attribute_agreement"] >= args.min_attribute_agreement
+        failed |= not ok
+        print(f"{precision:>6} {result['precision']:>6} {result['latency_ms']:>11.1f} ms {result['rss_mb']:>6.0f} MB "
+              f"{len(parity['scene_mismatches']) == 0!s:>6} {parity['attribute_agreement']:>10.0%}")
+        for mismatch in parity["scene_mismatches"]:
+            print(f"       {mismatch}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
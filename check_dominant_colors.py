@@ -0,0 +1,93 @@
+"""
+Check the in-memory dominant color extractor in visualize_objects.py against ColorThief.
+
+On the reference images, the dominant color of each box is computed with
+`dominant_colors` (all boxes in one call) and with ColorThief on the same
+crop. The CSS color names are compared and the RGB distance between the two
+colors is reported. Boxes come from the detector, or with --grid from a
+3x3 grid over each image, which needs no models.
+
+Exits non-zero if color name agreement falls below --min-agreement.
+
+    python check_dominant_colors.py [--grid] [--min-agreement 0.7]
+"""
+import argparse
+import io
+import statistics
+import time
+
+import numpy as np
+from colorthief import ColorThief
+
+from benchmark_support import reference_image_paths
+from decoded_image import DecodedImage
+from visualize_objects import closest_css_colors, dominant_colors
+
+
+def grid_boxes(size, cells=3):
+    width, height = size
+    return [
+        (col * width // cells, row * height // cells, (col + 1) * width // cells, (row + 1) * height // cells)
+        for row in range(cells) for col in range(cells)
+    ]
+
+
+def detector_boxes(image):
+    from model_registry import get_registry
+    from room_object_analysis import filter_detections
+
+    result = get_registry().yolo(image, verbose=False)[0]
+    objects = filter_detections(result.boxes.data.cpu().numpy(), result.names, image.size)
+    return [tuple(obj[:4]) for obj in objects]
+
+
+def colorthief_color(crop):
+    # In memory, as PNG so ColorThief sees the same pixels
+    buffer = io.BytesIO()
+    crop.save(buffer, format="PNG")
+    buffer.seek(0)
+    return ColorThief(buffer).get_color(quality=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--grid", action="store_true", help="Use a 3x3 grid of boxes instead of the detector")
+    parser.add_argument("--min-agreement", type=float, default=0.7)
+    args = parser.parse_args()
+
+    matches, distances, ours_ms, theirs_ms = [], [], 0.0, 0.0
+    for path in reference_image_paths():
+        image = DecodedImage.from_path(path).pil
+        boxes = grid_boxes(image.size) if args.grid else detector_boxes(image)
+        if not boxes:
+            continue
+
+        start = time.perf_counter()
+        ours = dominant_colors(image, boxes)
+        ours_ms += (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        theirs = [colorthief_color(image.crop(tuple(int(v) for v in box))) for box in boxes]
+        theirs_ms += (time.perf_counter() - start) * 1000
+
+        for box, ours_rgb, theirs_rgb, ours_name, theirs_name in zip(
+            boxes, ours, theirs, closest_css_colors(ours), closest_css_colors(theirs)
+        ):
+            distance = float(np.linalg.norm(np.subtract(ours_rgb, theirs_rgb)))
+            matches.append(ours_name == theirs_name)
+            distances.append(distance)
+            print(f"{path:<28} {str(tuple(int(v) for v in box)):<24} "
+                  f"{ours_name:>16} {theirs_name:>16} {distance:>6.1f}")
+
+    if not matches:
+        raise SystemExit("No boxes to compare")
+    agreement = sum(matches) / len(matches)
+    print(f"\nColor name agreement: {agreement:.0%} over {len(matches)} boxes")
+    print(f"RGB distance: median {statistics.median(distances):.1f}, max {max(distances):.1f}")
+    print(f"Time: dominant_colors {ours_ms:.1f} ms, ColorThief {theirs_ms:.1f} ms")
+    if agreement < args.min_agreement:
+        raise SystemExit(f"Agreement {agreement:.0%} is below {args.min_agreement:.0%}")
+
+
+if __name__ == "__main__":
+    main()
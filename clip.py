@@ -1,67 +1,44 @@
-from transformers import CLIPProcessor, CLIPModel
 import torch
-from PIL import Image
+from decoded_image import DecodedImage
 from models.room import RoomStyle, RoomType
+from model_registry import ModelRegistry, get_registry
 
+# Room types with styles as candidate text descriptions
+ROOM_TYPE_PROMPTS = [
+    "modern living room",
+    "imperial living room",
+    "rustic living room",
+    "minimalist dining room",
+    "vintage dining room",
+    "modern bedroom",
+    "industrial bedroom",
+    "traditional kitchen",
+    "modern kitchen",
+    "rustic bathroom",
+    "modern bathroom",
+    "luxury study room",
+    "industrial study room",
+    "modern outdoor patio",
+    "rustic outdoor patio",
+    "vintage hallway",
+    "modern hallway",
+    "traditional garden",
+    "modern garden",
+    "luxury home office",
+    "modern home office",
+    "rustic library",
+    "luxury library",
+    "modern nursery",
+    "vintage nursery",
+    "rustic bedroom",
+    "luxury bedroom"
+]
 
-def get_clip_embeddings(image_path):
-
-    # Load the model and processor
-    model = CLIPModel.from_pretrained("openai/clip-vit-base-patch32")
-    processor = CLIPProcessor.from_pretrained("openai/clip-vit-base-patch32")
-
-    # Define room types with styles as candidate text descriptions
-    room_types = [
-        "modern living room",
-        "imperial living room",
-        "rustic living room",
-        "minimalist dining room",
-        "vintage dining room",
-        "modern bedroom",
-        "industrial bedroom",
-        "traditional kitchen",
-        "modern kitchen",
-        "rustic bathroom",
-        "modern bathroom",
-        "luxury study room",
-        "industrial study room",
-        "modern outdoor patio",
-        "rustic outdoor patio",
-        "vintage hallway",
-        "modern hallway",
-        "traditional garden",
-        "modern garden",
-        "luxury home office",
-        "modern home office",
-        "rustic library",
-        "luxury library",
-        "modern nursery",
-        "vintage nursery",
-        "rustic bedroom",
-        "luxury bedroom"
-    ]
-
-    # Compute text embeddings for room types
-    text_inputs = processor(text=room_types, return_tensors="pt", padding=True, truncation=True)
-    with torch.no_grad():
-        text_features = model.get_text_features(**text_inputs)
-    text_features /= text_features.norm(dim=-1, keepdim=True)  # Normalize
-
-    image = Image.open(image_path)
-    image_inputs = processor(images=image, return_tensors="pt")
-
-    # Compute image embeddings
-    with torch.no_grad():
-        image_features = model.get_image_features(**image_inputs)
-    image_features /= image_features.norm(dim=-1, keepdim=True)  # Normalize
-
-    # Find the closest room type and style to the image
-    similarities = torch.matmul(image_features, text_features.T)
-    best_match_idx = torch.argmax(similarities, dim=1)
-    best_match = room_types[best_match_idx.item()]
 
+def _parse_room_prompt(prompt):
+    """Map a matched room type prompt to its (RoomStyle, RoomType) enums."""
     # Split into style and room type
-    parts = best_match.split()
+    parts = prompt.split()
     style = parts[0]  # First word is the style
     room_type = " ".join(parts[1:])  # Rest is the room type
 
@@ -78,7 +55,46 @@ def get_clip_embeddings(image_path):
         room_type = RoomType[room_type_key]
     except KeyError:
         # Default to living room if type not found in enum
-        room_type_enum = RoomType.LIVING_ROOM
+        room_type = RoomType.LIVING_ROOM
+
+    return room_style, room_type
+
+
+def classify_room_images(images, registry: ModelRegistry = None):
+    """
+    Classify the style and type of several room images with one CLIP forward pass.
+
+    Args:
+        images (list): Decoded PIL images
+        registry (ModelRegistry): Registry providing the shared CLIP model
+
+    Returns:
+        list: A (RoomStyle, RoomType) tuple per image
+    """
+    # Use the shared model and processor
+    registry = registry or get_registry()
+
+    room_types = ROOM_TYPE_PROMPTS
+
+    # Look up the precomputed text embeddings for room types
+    text_features = registry.text_embeddings(room_types)
+
+    # Compute normalized image embeddings
+    image_features = registry.encode_images(images)
+
+    # Find the closest room type and style to each image
+    similarities = torch.matmul(image_features, text_features.T)
+    best_match_idx = torch.argmax(similarities, dim=1)
+
+    classifications = []
+    for idx in best_match_idx.tolist():
+        room_style, room_type = _parse_room_prompt(room_types[idx])
+        print(f"Detected Style: {room_style.value}, Room Type: {room_type.value}")
+        classifications.append((room_style, room_type))
+    return classifications
+
 
-    print(f"Detected Style: {room_style.value}, Room Type: {room_type.value}")
-    return room_style, room_type
\ No newline at end of file
+def get_clip_embeddings(image, registry: ModelRegistry = None):
+    # Accept either an image path or an already decoded image
+    image = DecodedImage.load(image)
+    return classify_room_images([image.pil], registry)[0]
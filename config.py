@@ -12,5 +12,95 @@ class Config:
     STABLE_DIFFUSION_API_KEY = os.getenv('STABLE_DIFFUSION_API_KEY')
     STABLE_DIFFUSION_BASE_URL = os.getenv('STABLE_DIFFUSION_BASE_URL', 'https://modelslab.com/api/v6')
 
+    # Pinterest HTTP client
+    HTTP_TIMEOUT_SECONDS = float(os.getenv('HTTP_TIMEOUT_SECONDS', '10'))
+    HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv('HTTP_CONNECT_TIMEOUT_SECONDS', '5'))
+    HTTP_MAX_BODY_BYTES = int(os.getenv('HTTP_MAX_BODY_BYTES', str(20 * 1024 * 1024)))
+    HTTP_MAX_PAGE_BYTES = int(os.getenv('HTTP_MAX_PAGE_BYTES', str(2 * 1024 * 1024)))
+    HTTP_MAX_CONNECTIONS = int(os.getenv('HTTP_MAX_CONNECTIONS', '100'))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('HTTP_MAX_KEEPALIVE_CONNECTIONS', '20'))
+    HTTP2_ENABLED = os.getenv('HTTP2_ENABLED', 'true').lower() == 'true'
+    HTTP_USER_AGENT = os.getenv('HTTP_USER_AGENT', 'Mozilla/5.0 (compatible; NectarRoomAnalyzer/1.0)')
+
+    # Downloaded Pinterest image cache
+    DOWNLOAD_CACHE_ENABLED = os.getenv('DOWNLOAD_CACHE_ENABLED', 'true').lower() == 'true'
+    DOWNLOAD_CACHE_DIR = os.getenv('DOWNLOAD_CACHE_DIR', 'cache/downloads')
+    DOWNLOAD_CACHE_MAX_DISK_BYTES = int(os.getenv('DOWNLOAD_CACHE_MAX_DISK_BYTES', str(2 * 1024 ** 3)))
+    DOWNLOAD_CACHE_MAX_MEMORY_BYTES = int(os.getenv('DOWNLOAD_CACHE_MAX_MEMORY_BYTES', str(256 * 1024 ** 2)))
+
+    # Perceptual-hash cache of analyze results for near-duplicate images
+    ANALYSIS_CACHE_ENABLED = os.getenv('ANALYSIS_CACHE_ENABLED', 'true').lower() == 'true'
+    ANALYSIS_CACHE_PATH = os.getenv('ANALYSIS_CACHE_PATH', 'cache/analysis_results.sqlite3')
+    ANALYSIS_CACHE_MAX_DISTANCE = int(os.getenv('ANALYSIS_CACHE_MAX_DISTANCE', '6'))  # bits out of 64
+
+    # Batch analysis: per-stage concurrency bounds
+    BATCH_MAX_URLS = int(os.getenv('BATCH_MAX_URLS', '100'))
+    BATCH_DOWNLOAD_CONCURRENCY = int(os.getenv('BATCH_DOWNLOAD_CONCURRENCY', '16'))
+    BATCH_DECODE_CONCURRENCY = int(os.getenv('BATCH_DECODE_CONCURRENCY', '4'))
+    BATCH_ANALYZE_CONCURRENCY = int(os.getenv('BATCH_ANALYZE_CONCURRENCY', '16'))
+    BATCH_UPLOAD_CONCURRENCY = int(os.getenv('BATCH_UPLOAD_CONCURRENCY', '8'))
+
+    # Analysis models
+    CLIP_MODEL_NAME = os.getenv('CLIP_MODEL_NAME', 'openai/clip-vit-base-patch32')
+    # Detector tiers: yolov8n, yolov8s, yolov8m, yolov8x or home_decor (fine-tuned)
+    DETECTOR_TIER = os.getenv('DETECTOR_TIER', 'yolov8x')
+    # Empty means the newest runs/detect/yolov8_home_decor*/weights/best.pt
+    DETECTOR_FINETUNED_WEIGHTS = os.getenv('DETECTOR_FINETUNED_WEIGHTS', '')
+    # Per-tier latency and mAP written by benchmark_detector_tiers.py
+    DETECTOR_PROFILE_PATH = os.getenv('DETECTOR_PROFILE_PATH', 'detector_profile.json')
+    # Detections kept for attribute classification
+    DETECTION_MIN_CONFIDENCE = float(os.getenv('DETECTION_MIN_CONFIDENCE', '0.35'))
+    DETECTION_MIN_AREA_RATIO = float(os.getenv('DETECTION_MIN_AREA_RATIO', '0.005'))  # Fraction of the image
+    DETECTION_MAX_OBJECTS = int(os.getenv('DETECTION_MAX_OBJECTS', '20'))
+    # Comma-separated COCO classes; empty keeps every class
+    DETECTION_CLASS_ALLOWLIST = {
+        name.strip() for name in os.getenv(
+            'DETECTION_CLASS_ALLOWLIST',
+            'chair,couch,potted plant,bed,dining table,toilet,tv,laptop,microwave,oven,'
+            'toaster,sink,refrigerator,book,clock,vase,bench,bowl,cup,wine glass'
+        ).split(',') if name.strip()
+    }
+    # Detector and scene classification input size; images are decoded no larger for them
+    IMAGE_DECODE_MAX_SIDE = int(os.getenv('IMAGE_DECODE_MAX_SIDE', '640'))
+    CLIP_MAX_BATCH_SIZE = int(os.getenv('CLIP_MAX_BATCH_SIZE', '32'))
+    ATTRIBUTE_TOP_K = int(os.getenv('ATTRIBUTE_TOP_K', '3'))
+    # CLIP inference precision: "fp32", "int8" (dynamic quantization) or "bf16" (CPUs with native bf16)
+    CLIP_PRECISION = os.getenv('CLIP_PRECISION', 'fp32')
+    # Model runtime: "pytorch" or "exported" (ONNX Runtime / TorchScript files from export_models.py)
+    MODEL_RUNTIME = os.getenv('MODEL_RUNTIME', 'pytorch')
+    EXPORT_DIR = os.getenv('EXPORT_DIR', 'exported_models')
+    # Threads per ONNX Runtime session; 0 leaves the runtime default. TorchScript uses TORCH_THREADS
+    RUNTIME_INTRA_OP_THREADS = int(os.getenv('RUNTIME_INTRA_OP_THREADS', '0'))
+    RUNTIME_INTER_OP_THREADS = int(os.getenv('RUNTIME_INTER_OP_THREADS', '0'))
+    # ONNX Runtime graph optimizations: "disable", "basic", "extended" or "all"
+    ONNX_GRAPH_OPTIMIZATION = os.getenv('ONNX_GRAPH_OPTIMIZATION', 'all')
+    # Object embeddings: "crop" encodes each crop, "roi" pools patch tokens from one full-image pass
+    ATTRIBUTE_MODE = os.getenv('ATTRIBUTE_MODE', 'crop')
+    # In crop mode, object crops are cut from a decode up to this size so small objects keep their detail
+    ATTRIBUTE_CROP_MAX_SIDE = int(os.getenv('ATTRIBUTE_CROP_MAX_SIDE', '1600'))
+    # Pin image variant to download: the smallest served size covering this side. 0 means the
+    # model input (IMAGE_DECODE_MAX_SIDE); raising it to ATTRIBUTE_CROP_MAX_SIDE gives crops more
+    # detail at the cost of downloading (often) the full-size original
+    PIN_IMAGE_TARGET_SIDE = int(os.getenv('PIN_IMAGE_TARGET_SIDE', '0'))
+    TEXT_EMBEDDING_CACHE_DIR = os.getenv('TEXT_EMBEDDING_CACHE_DIR', 'cache/text_embeddings')
+
+    # Cross-request micro-batching
+    INFERENCE_MAX_BATCH_SIZE = int(os.getenv('INFERENCE_MAX_BATCH_SIZE', '8'))
+    INFERENCE_MAX_WAIT_MS = float(os.getenv('INFERENCE_MAX_WAIT_MS', '5'))
+
+    # Executor for blocking download and inference stages: "thread" or "process"
+    INFERENCE_EXECUTOR = os.getenv('INFERENCE_EXECUTOR', 'thread')
+    INFERENCE_WORKERS = int(os.getenv('INFERENCE_WORKERS', '0'))  # 0 means one per CPU
+
+    # Torch threads per process; 0 keeps torch's default
+    TORCH_THREADS = int(os.getenv('TORCH_THREADS', '0'))
+    TORCH_INTEROP_THREADS = int(os.getenv('TORCH_INTEROP_THREADS', '0'))
+    # Written by autotune.py; its settings apply at startup unless set explicitly above
+    INFERENCE_PROFILE_PATH = os.getenv('INFERENCE_PROFILE_PATH', 'inference_profile.json')
+
+    # Web workers; more than one pre-forks them from a master that has loaded the models
+    WEB_WORKERS = int(os.getenv('WEB_WORKERS', '1'))
+    PREFORK_TORCH_THREADS = int(os.getenv('PREFORK_TORCH_THREADS', '0'))  # 0 splits the CPUs between workers
+
 
 config = Config()
\ No newline at end of file
@@ -0,0 +1,126 @@
+import io
+import math
+from typing import Optional, Sequence, Tuple, Union
+
+from PIL import Image
+
+from config import config
+
+
+def detail_max_side() -> int:
+    """Largest side any consumer needs: the attribute crop size in crop mode, else the model input size."""
+    if config.ATTRIBUTE_MODE == "crop":
+        return max(config.IMAGE_DECODE_MAX_SIDE, config.ATTRIBUTE_CROP_MAX_SIDE)
+    return config.IMAGE_DECODE_MAX_SIDE
+
+
+class DecodedImage:
+    """
+    An image decoded once and shared by YOLO, CLIP and color extraction.
+
+    Large JPEGs are decoded in PIL draft mode, which scales them down in the DCT
+    domain. `pil` is capped at `max_side` pixels, the model input size, for the
+    detector and scene classification. `detail` keeps up to `detail_side`
+    pixels, so attribute crops of small objects are not cut from the
+    downscaled image; it is `pil` itself when no larger copy is needed.
+    """
+
+    def __init__(
+        self,
+        image: Image.Image,
+        source_size: Optional[Tuple[int, int]] = None,
+        source_format: Optional[str] = None,
+        detail: Optional[Image.Image] = None
+    ):
+        self.pil = image if image.mode == "RGB" else image.convert("RGB")
+        self.source_size = source_size or self.pil.size
+        self.source_format = source_format
+        if detail is None:
+            self.detail = self.pil
+        else:
+            self.detail = detail if detail.mode == "RGB" else detail.convert("RGB")
+
+    @classmethod
+    def from_bytes(
+        cls,
+        data: bytes,
+        max_side: Optional[int] = None,
+        detail_side: Optional[int] = None
+    ) -> "DecodedImage":
+        return cls._decode(io.BytesIO(data), max_side, detail_side)
+
+    @classmethod
+    def from_path(
+        cls,
+        path: str,
+        max_side: Optional[int] = None,
+        detail_side: Optional[int] = None
+    ) -> "DecodedImage":
+        return cls._decode(path, max_side, detail_side)
+
+    @classmethod
+    def load(cls, source: Union[str, Image.Image, "DecodedImage"]) -> "DecodedImage":
+        """Return `source` itself if already decoded, wrap a PIL image, or decode a path from disk."""
+        if isinstance(source, DecodedImage):
+            return source
+        if isinstance(source, Image.Image):
+            return cls(source)
+        return cls.from_path(source)
+
+    @classmethod
+    def _decode(cls, fp, max_side: Optional[int], detail_side: Optional[int]) -> "DecodedImage":
+        max_side = max_side or config.IMAGE_DECODE_MAX_SIDE
+        detail_side = max(max_side, detail_side or detail_max_side())
+        with Image.open(fp) as image:
+            source_size, source_format = image.size, image.format
+            if image.format == "JPEG":
+                # Only reduces by powers of two and keeps both sides at or above
+                # the request, so ask for the fitted size, not a square
+                scale = detail_side / max(image.size)
+                image.draft("RGB", (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+            detail = image.convert("RGB")
+
+        if max(detail.size) > detail_side:
+            detail.thumbnail((detail_side, detail_side), Image.BICUBIC)
+        decoded = detail
+        if max(detail.size) > max_side:
+            decoded = detail.copy()
+            decoded.thumbnail((max_side, max_side), Image.BICUBIC)
+        return cls(decoded, source_size, source_format, detail)
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.pil.size
+
+    @property
+    def mime_type(self) -> str:
+        """MIME type of the encoded source image."""
+        return Image.MIME.get(self.source_format, "image/jpeg")
+
+    def to_source_coordinates(self, box: Sequence[float]) -> Tuple[float, ...]:
+        """Map an (x1, y1, x2, y2) box on the decoded image back to the original image."""
+        scale_x = self.source_size[0] / self.size[0]
+        scale_y = self.source_size[1] / self.size[1]
+        x1, y1, x2, y2 = box
+        return (float(x1) * scale_x, float(y1) * scale_y, float(x2) * scale_x, float(y2) * scale_y)
+
+    def crop_detail(self, box: Sequence[float]) -> Image.Image:
+        """Crop an (x1, y1, x2, y2) box on the decoded image out of the higher-resolution `detail` image."""
+        scale_x = self.detail.size[0] / self.size[0]
+        scale_y = self.detail.size[1] / self.size[1]
+        x1, y1, x2, y2 = box
+        return self.detail.crop((
+            float(x1) * scale_x, float(y1) * scale_y, float(x2) * scale_x, float(y2) * scale_y
+        ))
+
+    def __getstate__(self):
+        return {
+            "pil": self.pil,
+            "source_size": self.source_size,
+            "source_format": self.source_format,
+            # Don't ship a second copy of the pixels when `detail` is `pil`
+            "detail": None if self.detail is self.pil else self.detail,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(state["pil"], state["source_size"], state["source_format"], state.get("detail"))
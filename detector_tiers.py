@@ -0,0 +1,155 @@
+import glob
+import json
+import logging
+import os
+from typing import Callable, Dict, Optional
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Stock COCO detectors, fastest first
+STOCK_TIERS = {
+    "yolov8n": "yolov8n.pt",
+    "yolov8s": "yolov8s.pt",
+    "yolov8m": "yolov8m.pt",
+    "yolov8x": "yolov8x.pt",
+}
+FINETUNED_TIER = "home_decor"
+# Least to most accurate on room photos, for tiers whose mAP was not measured
+# on a common dataset: the stock models by size, then the home-decor fine-tune
+QUALITY_ORDER = [*STOCK_TIERS, FINETUNED_TIER]
+FINETUNED_WEIGHTS_PATTERN = "runs/detect/yolov8_home_decor*/weights/best.pt"
+
+
+class UnknownDetectorTierError(ValueError):
+    """Raised when a request names a detector tier this server does not have."""
+
+
+def find_finetuned_weights() -> Optional[str]:
+    """Return the configured fine-tuned home-decor weights, or the newest training run's best.pt."""
+    if config.DETECTOR_FINETUNED_WEIGHTS:
+        return config.DETECTOR_FINETUNED_WEIGHTS
+    runs = glob.glob(FINETUNED_WEIGHTS_PATTERN)
+    return max(runs, key=os.path.getmtime) if runs else None
+
+
+def detector_tiers() -> Dict[str, str]:
+    """Map each available detector tier to its weights file."""
+    tiers = dict(STOCK_TIERS)
+    finetuned = find_finetuned_weights()
+    if finetuned:
+        tiers[FINETUNED_TIER] = finetuned
+    return tiers
+
+
+def load_tier_profile(path: Optional[str] = None) -> Dict[str, dict]:
+    """
+    Load the measured latency and mAP per tier written by benchmark_detector_tiers.py.
+
+    Each tier's `map_dataset` names the labeled dataset its mAP was measured
+    on; mAP is null for tiers whose classes match none of the datasets.
+
+    Returns an empty profile if the benchmark has not been run.
+    """
+    path = path or config.DETECTOR_PROFILE_PATH
+    try:
+        with open(path) as f:
+            return json.load(f)["tiers"]
+    except FileNotFoundError:
+        return {}
+    except (ValueError, KeyError) as e:
+        logger.warning(f"Ignoring unreadable detector profile {path}: {str(e)}")
+        return {}
+
+
+class DetectorTierSelector:
+    """
+    Chooses the detector tier for a request.
+
+    An explicitly requested tier wins. Otherwise, given a latency budget, the
+    most accurate profiled tier whose expected latency fits is used: by mAP
+    if every fitting tier was measured on the same dataset, else by
+    QUALITY_ORDER, since mAP on different label sets is not comparable. Expected
+    latency is the tier's measured per-image latency times the images already
+    queued for it (`queue_depth(tier)`) plus this one, spread over the
+    executor workers. Without a budget or a profile the default tier is used;
+    if no tier fits the budget, the one expected to finish first is used.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        queue_depth: Callable[[str], int] = lambda tier: 0,
+        profile: Optional[Dict[str, dict]] = None,
+        default_tier: Optional[str] = None
+    ):
+        self.tiers = detector_tiers()
+        self.workers = max(1, workers)
+        self.queue_depth = queue_depth
+        self.profile = {tier: stats for tier, stats in (profile or {}).items() if tier in self.tiers}
+        self.default_tier = default_tier or config.DETECTOR_TIER
+        if self.default_tier not in self.tiers:
+            raise UnknownDetectorTierError(f"Unknown default detector tier: {self.default_tier}")
+
+    def expected_latency_ms(self, tier: str, queue_depth: int) -> Optional[float]:
+        latency_ms = self.profile.get(tier, {}).get("latency_ms")
+        if latency_ms is None:
+            return None
+        return latency_ms * (queue_depth / self.workers + 1)
+
+    def choose(
+        self,
+        tier: Optional[str] = None,
+        latency_budget_ms: Optional[float] = None
+    ) -> str:
+        """
+        Args:
+            tier: Tier requested by the client, if any
+            latency_budget_ms: Detection latency the client can afford, if any
+
+        Returns:
+            str: Name of the tier to run
+        """
+        if tier is not None:
+            if tier not in self.tiers:
+                raise UnknownDetectorTierError(
+                    f"Unknown detector tier '{tier}', expected one of {sorted(self.tiers)}"
+                )
+            return tier
+
+        if latency_budget_ms is None or not self.profile:
+            return self.default_tier
+
+        candidates = []
+        for name in self.profile:
+            expected = self.expected_latency_ms(name, self.queue_depth(name))
+            if expected is not None:
+                candidates.append((name, expected))
+        if not candidates:
+            return self.default_tier
+
+        fitting = [name for name, expected in candidates if expected <= latency_budget_ms]
+        if fitting:
+            return self.most_accurate(fitting)
+        return min(candidates, key=lambda candidate: candidate[1])[0]
+
+    def most_accurate(self, names) -> str:
+        """Pick the most accurate of `names`, comparing mAP only when measured on the same dataset."""
+        datasets = {self.profile[name].get("map_dataset") for name in names}
+        measured = all(self.profile[name].get("map50_95") is not None for name in names)
+        if measured and len(datasets) == 1:
+            return max(names, key=lambda name: self.profile[name]["map50_95"])
+        return max(names, key=lambda name: (
+            QUALITY_ORDER.index(name) if name in QUALITY_ORDER else -1,
+            self.profile[name]["latency_ms"]
+        ))
+
+    def stats(self) -> Dict[str, dict]:
+        return {
+            "default": self.default_tier,
+            "tiers": {
+                name: {"weights": weights, **self.profile.get(name, {})}
+                for name, weights in self.tiers.items()
+            },
+        }
@@ -0,0 +1,214 @@
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+_PIN_ID = re.compile(r"/pin/(\d+)")
+
+
+def normalize_pin_key(pin_url: str) -> str:
+    """
+    Normalize a Pinterest URL to a cache key.
+
+    Pin URLs on any Pinterest domain map to their numeric pin ID; other URLs
+    lose their scheme, query, fragment and trailing slash.
+    """
+    parts = urlsplit(pin_url.strip())
+    match = _PIN_ID.search(parts.path)
+    if match and "pinterest." in parts.netloc.lower():
+        return f"pin:{match.group(1)}"
+    return f"url:{parts.netloc.lower()}{parts.path.rstrip('/')}"
+
+
+class DownloadCache:
+    """
+    Content-addressed cache of downloaded Pinterest images.
+
+    Image bytes are stored once per SHA-256 digest under `cache_dir/blobs`, and
+    an index maps normalized pin keys to digests, so re-pins of the same image
+    share a blob. The index, each blob's size and last use live in SQLite, so
+    every web worker shares them and the disk tier is evicted
+    least-recently-used once the whole cache exceeds `max_disk_bytes`. The
+    most recently used images are also held in each worker's memory up to
+    `max_memory_bytes`.
+    """
+
+    def __init__(self, cache_dir: str, max_disk_bytes: int, max_memory_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.blob_dir = self.cache_dir / "blobs"
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self._lock = threading.Lock()
+
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        # Autocommit; writes take the database lock with BEGIN IMMEDIATE, waiting for other workers
+        self._db = sqlite3.connect(
+            self.cache_dir / "index.sqlite3", timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            "digest TEXT PRIMARY KEY, "
+            "size INTEGER NOT NULL, "
+            "last_used REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pin_keys ("
+            "key TEXT PRIMARY KEY, "
+            "digest TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS blobs_last_used ON blobs (last_used)")
+        self._adopt_blobs()
+
+    def _adopt_blobs(self):
+        # Count blob files the index does not know about, so eviction can reclaim them;
+        # skip temporary files left by interrupted writes
+        with self._lock, self._transaction():
+            known = {digest for digest, in self._db.execute("SELECT digest FROM blobs")}
+            for blob in self.blob_dir.iterdir():
+                if "." in blob.name or blob.name in known:
+                    continue
+                stat = blob.stat()
+                self._db.execute(
+                    "INSERT OR IGNORE INTO blobs (digest, size, last_used) VALUES (?, ?, ?)",
+                    (blob.name, stat.st_size, stat.st_mtime)
+                )
+
+    @contextmanager
+    def _transaction(self):
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached image for a normalized pin key, or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT pin_keys.digest FROM pin_keys JOIN blobs ON blobs.digest = pin_keys.digest "
+                "WHERE pin_keys.key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            digest, = row
+
+            data = self._memory.get(digest)
+            if data is not None:
+                self._memory.move_to_end(digest)
+                self._touch(digest)
+                self.memory_hits += 1
+                return data
+
+            try:
+                data = (self.blob_dir / digest).read_bytes()
+            except OSError:
+                # Blob removed behind our back, e.g. by another worker's eviction
+                with self._transaction():
+                    self._forget(digest)
+                self.misses += 1
+                return None
+
+            self._touch(digest)
+            self._remember(digest, data)
+            self.disk_hits += 1
+            return data
+
+    def put(self, key: str, data: bytes) -> str:
+        """Store image bytes under a normalized pin key and return their digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            blob_path = self.blob_dir / digest
+            if not blob_path.exists():
+                tmp_path = self.blob_dir / f"{digest}.{os.getpid()}.tmp"
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, blob_path)
+
+            with self._transaction():
+                self._db.execute(
+                    "INSERT OR REPLACE INTO blobs (digest, size, last_used) VALUES (?, ?, ?)",
+                    (digest, len(data), time.time())
+                )
+                self._db.execute("INSERT OR REPLACE INTO pin_keys (key, digest) VALUES (?, ?)", (key, digest))
+                self._evict()
+            self._remember(digest, data)
+        return digest
+
+    def _touch(self, digest: str):
+        self._db.execute("UPDATE blobs SET last_used = ? WHERE digest = ?", (time.time(), digest))
+
+    def _remember(self, digest: str, data: bytes):
+        if len(data) > self.max_memory_bytes:
+            return
+        if digest not in self._memory:
+            self._memory[digest] = data
+            self._memory_bytes += len(data)
+        self._memory.move_to_end(digest)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _evict(self):
+        # Inside a write transaction, so workers don't evict concurrently
+        disk_bytes, = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()
+        if disk_bytes <= self.max_disk_bytes:
+            return
+        rows = self._db.execute("SELECT digest, size FROM blobs ORDER BY last_used").fetchall()
+        for digest, size in rows[:-1]:  # Always keep the most recent blob
+            if disk_bytes <= self.max_disk_bytes:
+                break
+            self._forget(digest)
+            try:
+                (self.blob_dir / digest).unlink()
+            except OSError:
+                pass
+            disk_bytes -= size
+            self.evictions += 1
+
+    def _forget(self, digest: str):
+        self._db.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+        self._db.execute("DELETE FROM pin_keys WHERE digest = ?", (digest,))
+        data = self._memory.pop(digest, None)
+        if data is not None:
+            self._memory_bytes -= len(data)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        with self._lock:
+            keys, = self._db.execute("SELECT COUNT(*) FROM pin_keys").fetchone()
+            blobs, disk_bytes = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0,
+            "evictions": self.evictions,
+            "keys": keys,
+            "blobs": blobs,
+            "disk_bytes": disk_bytes,
+            "memory_bytes": self._memory_bytes,
+        }
+
+    def close(self):
+        self._db.close()
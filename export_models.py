@@ -0,0 +1,195 @@
+"""
+Export the analysis models for serving with MODEL_RUNTIME=exported.
+
+Writes the CLIP image, text and region towers and the YOLO weights of the
+selected detector tiers to ONNX, falling back to TorchScript for any model
+whose ONNX export fails (or for all of them with --format torchscript).
+A manifest.json in the export directory records what was written.
+
+    python export_models.py [--format onnx|torchscript] [--tiers yolov8x home_decor]
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+
+import torch
+from transformers import CLIPModel
+
+from config import config
+from detector_tiers import detector_tiers
+from exported_models import MANIFEST_NAME
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ONNX_OPSET = 17
+
+
+class ImageTower(torch.nn.Module):
+    """CLIP vision tower returning the projected embedding and the patch tokens."""
+
+    def __init__(self, model: CLIPModel):
+        super().__init__()
+        self.model = model
+
+    def forward(self, pixel_values):
+        outputs = self.model.vision_model(pixel_values=pixel_values)
+        return self.model.visual_projection(outputs.pooler_output), outputs.last_hidden_state
+
+
+class TextTower(torch.nn.Module):
+    def __init__(self, model: CLIPModel):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model.get_text_features(input_ids=input_ids, attention_mask=attention_mask)
+
+
+class RegionHead(torch.nn.Module):
+    """Projects pooled patch tokens the way the class token is projected."""
+
+    def __init__(self, model: CLIPModel):
+        super().__init__()
+        self.model = model
+
+    def forward(self, pooled):
+        return self.model.visual_projection(self.model.vision_model.post_layernorm(pooled))
+
+
+def export_module(module: torch.nn.Module, example: tuple, names: dict, path: str, fmt: str) -> str:
+    """
+    Export `module` to `path` + extension and return the file name written.
+
+    Args:
+        module: Module to export
+        example: Example inputs for tracing
+        names: {"inputs": [...], "outputs": [...], "dynamic_axes": {...}}
+        path: Output path without extension
+        fmt: "onnx" to try ONNX first, "torchscript" to trace directly
+    """
+    if fmt == "onnx":
+        try:
+            torch.onnx.export(
+                module, example, f"{path}.onnx",
+                input_names=names["inputs"],
+                output_names=names["outputs"],
+                dynamic_axes=names["dynamic_axes"],
+                opset_version=ONNX_OPSET
+            )
+            return f"{os.path.basename(path)}.onnx"
+        except Exception as e:
+            logger.warning(f"ONNX export of {os.path.basename(path)} failed, falling back to TorchScript: {str(e)}")
+
+    with torch.no_grad():
+        traced = torch.jit.trace(module, example, strict=False)
+    traced.save(f"{path}.pt")
+    return f"{os.path.basename(path)}.pt"
+
+
+def export_clip(model_name: str, export_dir: str, fmt: str) -> dict:
+    model = CLIPModel.from_pretrained(model_name).eval()
+    vision_config = model.config.vision_config
+    side = vision_config.image_size
+
+    files = {
+        "image": export_module(
+            ImageTower(model),
+            (torch.randn(1, 3, side, side),),
+            {
+                "inputs": ["pixel_values"],
+                "outputs": ["image_embeds", "last_hidden_state"],
+                "dynamic_axes": {"pixel_values": {0: "batch"}, "image_embeds": {0: "batch"},
+                                 "last_hidden_state": {0: "batch"}},
+            },
+            os.path.join(export_dir, "clip_image"),
+            fmt
+        ),
+        "text": export_module(
+            TextTower(model),
+            (torch.ones(2, 8, dtype=torch.long), torch.ones(2, 8, dtype=torch.long)),
+            {
+                "inputs": ["input_ids", "attention_mask"],
+                "outputs": ["text_embeds"],
+                "dynamic_axes": {"input_ids": {0: "batch", 1: "sequence"},
+                                 "attention_mask": {0: "batch", 1: "sequence"}, "text_embeds": {0: "batch"}},
+            },
+            os.path.join(export_dir, "clip_text"),
+            fmt
+        ),
+        "region": export_module(
+            RegionHead(model),
+            (torch.randn(4, vision_config.hidden_size),),
+            {
+                "inputs": ["pooled"],
+                "outputs": ["region_embeds"],
+                "dynamic_axes": {"pooled": {0: "regions"}, "region_embeds": {0: "regions"}},
+            },
+            os.path.join(export_dir, "clip_region"),
+            fmt
+        ),
+    }
+    return {
+        "clip_model_name": model_name,
+        "image_size": side,
+        "patch_size": vision_config.patch_size,
+        "projection_dim": model.config.projection_dim,
+        "logit_scale": float(model.logit_scale.exp()),
+        "clip": files,
+    }
+
+
+def export_yolo(tier: str, weights: str, export_dir: str, fmt: str) -> str:
+    from ultralytics import YOLO
+
+    formats = ["onnx", "torchscript"] if fmt == "onnx" else ["torchscript"]
+    for yolo_format in formats:
+        try:
+            exported = YOLO(weights).export(
+                format=yolo_format,
+                imgsz=config.IMAGE_DECODE_MAX_SIDE,
+                dynamic=yolo_format == "onnx"
+            )
+        except Exception as e:
+            logger.warning(f"{yolo_format} export of {tier} failed: {str(e)}")
+            continue
+        name = f"yolo_{tier}{os.path.splitext(exported)[1]}"
+        shutil.move(exported, os.path.join(export_dir, name))
+        return name
+    raise RuntimeError(f"Could not export detector tier {tier}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", choices=["onnx", "torchscript"], default="onnx")
+    parser.add_argument("--tiers", nargs="+", default=[config.DETECTOR_TIER])
+    parser.add_argument("--output", default=config.EXPORT_DIR)
+    args = parser.parse_args()
+
+    tiers = detector_tiers()
+    unknown = [tier for tier in args.tiers if tier not in tiers]
+    if unknown:
+        raise SystemExit(f"Unknown detector tiers {unknown}, expected some of {sorted(tiers)}")
+
+    os.makedirs(args.output, exist_ok=True)
+    logger.info(f"Exporting {config.CLIP_MODEL_NAME}")
+    manifest = export_clip(config.CLIP_MODEL_NAME, args.output, args.format)
+    manifest["format"] = "onnx" if all(f.endswith(".onnx") for f in manifest["clip"].values()) else "torchscript"
+    if manifest["format"] == "torchscript" and args.format == "onnx":
+        # Serve CLIP from one runtime: re-trace any tower that did export to ONNX
+        manifest.update(export_clip(config.CLIP_MODEL_NAME, args.output, "torchscript"))
+
+    manifest["yolo"] = {}
+    for tier in args.tiers:
+        logger.info(f"Exporting detector tier {tier} ({tiers[tier]})")
+        manifest["yolo"][tier] = export_yolo(tier, tiers[tier], args.output, args.format)
+
+    with open(os.path.join(args.output, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+    logger.info(f"Wrote {args.output}/{MANIFEST_NAME}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import json
+import logging
+import os
+from typing import Dict, Optional, Tuple
+
+import torch
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+
+def load_manifest(export_dir: Optional[str] = None) -> Optional[Dict]:
+    """Return the manifest written by export_models.py, or None if nothing was exported."""
+    path = os.path.join(export_dir or config.EXPORT_DIR, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _onnx_session(path: str):
+    import onnxruntime as ort
+
+    levels = {
+        "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+        "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+        "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+        "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+    }
+    options = ort.SessionOptions()
+    options.graph_optimization_level = levels[config.ONNX_GRAPH_OPTIMIZATION]
+    # 0 lets ONNX Runtime pick one thread per physical core
+    options.intra_op_num_threads = config.RUNTIME_INTRA_OP_THREADS
+    options.inter_op_num_threads = config.RUNTIME_INTER_OP_THREADS
+    if config.RUNTIME_INTER_OP_THREADS > 1:
+        options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+    return ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+
+
+class ExportedClip:
+    """
+    CLIP image, text and region towers served from ONNX Runtime or TorchScript.
+
+    Takes the same preprocessed tensors as the PyTorch model and returns
+    unnormalized fp32 features, so `ModelRegistry` can swap it in behind
+    `encode_images`, `encode_image_regions` and the text embedding bank.
+    """
+
+    def __init__(self, manifest: Dict, export_dir: Optional[str] = None):
+        export_dir = export_dir or config.EXPORT_DIR
+        self.format = manifest["format"]
+        self.image_size = manifest["image_size"]
+        self.patch_size = manifest["patch_size"]
+        self.projection_dim = manifest["projection_dim"]
+        self.logit_scale = torch.tensor(manifest["logit_scale"])
+
+        paths = {name: os.path.join(export_dir, path) for name, path in manifest["clip"].items()}
+        if self.format == "onnx":
+            self._sessions = {name: _onnx_session(path) for name, path in paths.items()}
+        elif self.format == "torchscript":
+            # Runs on torch's thread pool, configured at startup (TORCH_THREADS / the inference profile)
+            self._modules = {name: torch.jit.load(path).eval() for name, path in paths.items()}
+        else:
+            raise ValueError(f"Unknown export format: {self.format}")
+
+    def _run(self, name: str, **inputs: torch.Tensor) -> Tuple[torch.Tensor, ...]:
+        if self.format == "onnx":
+            feeds = {key: value.numpy() for key, value in inputs.items()}
+            return tuple(torch.from_numpy(output) for output in self._sessions[name].run(None, feeds))
+        with torch.no_grad():
+            outputs = self._modules[name](*inputs.values())
+        return outputs if isinstance(outputs, tuple) else (outputs,)
+
+    def image_features(self, pixel_values: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Return (image embeddings, vision last hidden state) for a batch of pixel values."""
+        image_embeds, hidden = self._run("image", pixel_values=pixel_values.float())
+        return image_embeds, hidden
+
+    def text_features(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        return self._run("text", input_ids=input_ids.long(), attention_mask=attention_mask.long())[0]
+
+    def project_regions(self, pooled: torch.Tensor) -> torch.Tensor:
+        """Project pooled patch tokens into the joint embedding space."""
+        return self._run("region", pooled=pooled.float())[0]
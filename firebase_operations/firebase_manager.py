@@ -7,7 +7,9 @@ from models.room_relationship import (
 )
 from typing import List, Optional, Dict
 import uuid
+import asyncio
 import logging
+import mimetypes
 from pathlib import Path
 
 class FirebaseManager:
@@ -29,10 +31,20 @@ class FirebaseManager:
         blob.make_public()
         return blob.public_url
 
-    async def upload_room(self, image_path: str, metadata: dict) -> tuple[str, str]:
-        """Upload a room's image and metadata to Firebase."""
-        # Upload image first
-        image_url = self.upload_image(image_path)
+    def upload_image_bytes(self, image_bytes: bytes, content_type: str = "image/jpeg") -> str:
+        """Upload in-memory image bytes to Firebase Storage."""
+        if not image_bytes:
+            raise ValueError("Image data is empty")
+
+        extension = mimetypes.guess_extension(content_type) or ".jpg"
+        random_filename = f"{uuid.uuid4()}{extension}"
+
+        blob = self.bucket.blob(f"room_images_test/{random_filename}")
+        blob.upload_from_string(image_bytes, content_type=content_type)
+        blob.make_public()
+        return blob.public_url
+
+    def _save_room_metadata(self, image_url: str, metadata: dict) -> tuple[str, str]:
         metadata['image_url'] = image_url
         metadata['timestamp'] = datetime.now()
 
@@ -42,6 +54,23 @@ class FirebaseManager:
 
         return doc_ref.id, image_url
 
+    async def upload_room(self, image_path: str, metadata: dict) -> tuple[str, str]:
+        """Upload a room's image and metadata to Firebase."""
+        # Upload image first
+        image_url = self.upload_image(image_path)
+        return self._save_room_metadata(image_url, metadata)
+
+    async def upload_room_bytes(
+        self,
+        image_bytes: bytes,
+        metadata: dict,
+        content_type: str = "image/jpeg"
+    ) -> tuple[str, str]:
+        """Upload a room's in-memory image and metadata to Firebase without touching disk."""
+        # The storage and Firestore clients block, so keep them off the event loop
+        image_url = await asyncio.to_thread(self.upload_image_bytes, image_bytes, content_type)
+        return await asyncio.to_thread(self._save_room_metadata, image_url, metadata)
+
     async def get_room(self, room_id: str) -> Room:
         """Fetch a room by its ID."""
         doc = self.db.collection('room_metadata').document(room_id).get()
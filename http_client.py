@@ -0,0 +1,79 @@
+import importlib.util
+import logging
+from typing import AsyncIterator, Optional
+
+import httpx
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseTooLargeError(Exception):
+    """Raised when a response body exceeds the configured size limit."""
+
+
+class HTTPClient:
+    """
+    Shared async HTTP client for Pinterest page and image fetches.
+
+    One pooled `httpx.AsyncClient` keeps connections alive across requests,
+    speaks HTTP/2 when the `h2` package is installed, and enforces strict
+    timeouts and a maximum body size on every download.
+    """
+
+    def __init__(
+        self,
+        timeout: Optional[float] = None,
+        max_body_bytes: Optional[int] = None,
+        max_connections: Optional[int] = None
+    ):
+        self.max_body_bytes = max_body_bytes or config.HTTP_MAX_BODY_BYTES
+        self.http2 = config.HTTP2_ENABLED and importlib.util.find_spec("h2") is not None
+        self._client = httpx.AsyncClient(
+            http2=self.http2,
+            follow_redirects=True,
+            timeout=httpx.Timeout(
+                timeout or config.HTTP_TIMEOUT_SECONDS,
+                connect=config.HTTP_CONNECT_TIMEOUT_SECONDS
+            ),
+            limits=httpx.Limits(
+                max_connections=max_connections or config.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS
+            ),
+            headers={"User-Agent": config.HTTP_USER_AGENT}
+        )
+
+    async def stream(self, url: str, max_bytes: Optional[int] = None) -> AsyncIterator[bytes]:
+        """
+        Yield the response body of `url` in chunks, stopping with
+        ResponseTooLargeError once more than `max_bytes` have arrived.
+        """
+        max_bytes = max_bytes or self.max_body_bytes
+        async with self._client.stream("GET", url) as response:
+            response.raise_for_status()
+
+            content_length = response.headers.get("Content-Length")
+            if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+                raise ResponseTooLargeError(f"{url} is {content_length} bytes, limit is {max_bytes}")
+
+            received = 0
+            async for chunk in response.aiter_bytes():
+                received += len(chunk)
+                if received > max_bytes:
+                    raise ResponseTooLargeError(f"{url} exceeded the {max_bytes} byte limit")
+                yield chunk
+
+    async def fetch_bytes(self, url: str, max_bytes: Optional[int] = None) -> bytes:
+        """Download `url` fully into memory."""
+        buffer = bytearray()
+        async for chunk in self.stream(url, max_bytes):
+            buffer.extend(chunk)
+        return bytes(buffer)
+
+    async def fetch_text(self, url: str, max_bytes: Optional[int] = None) -> str:
+        """Download `url` and decode it as UTF-8 text."""
+        return (await self.fetch_bytes(url, max_bytes)).decode("utf-8", errors="replace")
+
+    async def aclose(self):
+        await self._client.aclose()
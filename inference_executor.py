@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+from config import config
+from clip import ROOM_TYPE_PROMPTS
+from inference_profile import apply_inference_profile, apply_torch_threads
+from model_registry import ModelRegistry, get_registry
+from room_object_analysis import ATTRIBUTE_PROMPTS
+
+logger = logging.getLogger(__name__)
+
+
+def load_analysis_models(warmup: bool = True) -> ModelRegistry:
+    """Load, warm and preload prompt embeddings for this process's model registry."""
+    registry = get_registry().load()
+    if warmup:
+        registry.warmup()
+    registry.preload_text_embeddings([ROOM_TYPE_PROMPTS, *ATTRIBUTE_PROMPTS.values()])
+    return registry
+
+
+# Set in each process worker by its initializer, see InferenceExecutor.prime
+_prime_barrier = None
+
+
+def _init_process_worker(prime_barrier):
+    global _prime_barrier
+    _prime_barrier = prime_barrier
+    logger.info(f"Loading analysis models in inference worker {os.getpid()}")
+    # Spawned workers start from a fresh config: re-apply the tuned profile
+    apply_inference_profile()
+    apply_torch_threads()
+    load_analysis_models()
+
+
+def _wait_for_workers() -> int:
+    # Each worker blocks here until all of them hold one of these tasks, so
+    # every worker has been spawned and has run its initializer
+    _prime_barrier.wait()
+    return os.getpid()
+
+
+class InferenceExecutor:
+    """
+    Runs blocking download and inference stages off the event loop.
+
+    `thread` mode shares the models already loaded in this process. `process`
+    mode spawns workers that each load their own copy of the models, which
+    sidesteps the GIL for preprocessing at the cost of memory per worker.
+    """
+
+    def __init__(self, kind: Optional[str] = None, workers: Optional[int] = None):
+        self.kind = kind or config.INFERENCE_EXECUTOR
+        self.workers = workers or config.INFERENCE_WORKERS or os.cpu_count() or 1
+
+        if self.kind == "thread":
+            self._executor: Executor = ThreadPoolExecutor(
+                max_workers=self.workers,
+                thread_name_prefix="inference"
+            )
+        elif self.kind == "process":
+            # Spawn rather than fork: forking after torch has started its thread pools can deadlock
+            context = multiprocessing.get_context("spawn")
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=_init_process_worker,
+                initargs=(context.Barrier(self.workers),)
+            )
+        else:
+            raise ValueError(f"Unknown inference executor: {self.kind}")
+
+    @property
+    def loads_models_in_workers(self) -> bool:
+        return self.kind == "process"
+
+    def prime(self):
+        """
+        Start every process worker and wait until each has loaded its models.
+
+        The pool spawns workers lazily on submit, so without this the first
+        requests would wait for model loading. A no-op in thread mode.
+        """
+        if not self.loads_models_in_workers:
+            return
+        futures = [self._executor.submit(_wait_for_workers) for _ in range(self.workers)]
+        pids = [future.result() for future in futures]
+        logger.info(f"Inference workers ready: {sorted(pids)}")
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run `fn(*args, **kwargs)` in the executor and await its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"kind": self.kind, "workers": self.workers}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,64 @@
+import json
+import logging
+import os
+from typing import Dict, Optional
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Profile key -> config attribute it sets
+PROFILE_SETTINGS = {
+    "torch_threads": "TORCH_THREADS",
+    "interop_threads": "TORCH_INTEROP_THREADS",
+    "executor_workers": "INFERENCE_WORKERS",
+    "max_batch_size": "INFERENCE_MAX_BATCH_SIZE",
+}
+# Settings tuned for the whole machine, split between pre-forked web workers
+PER_MACHINE_SETTINGS = {"torch_threads", "executor_workers"}
+
+
+def apply_inference_profile(path: Optional[str] = None, web_workers: int = 1) -> Optional[Dict]:
+    """
+    Apply the thread, worker and batch settings chosen by autotune.py to `config`.
+
+    Settings given explicitly as environment variables take precedence over
+    the profile. autotune.py measures one process using the whole machine, so
+    with several pre-forked `web_workers` each gets its share of the
+    profile's threads and executor workers. Returns the profile, or None if
+    autotune has not been run.
+    """
+    path = path or config.INFERENCE_PROFILE_PATH
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            profile = json.load(f)
+    except ValueError as e:
+        logger.warning(f"Ignoring unreadable inference profile {path}: {str(e)}")
+        return None
+
+    applied = {}
+    for key, attribute in PROFILE_SETTINGS.items():
+        if key in profile and attribute not in os.environ:
+            value = profile[key]
+            if key in PER_MACHINE_SETTINGS and value:
+                value = max(1, value // max(1, web_workers))
+            setattr(config, attribute, value)
+            applied[attribute] = value
+    logger.info(f"Applied inference profile {path}: {applied}")
+    return profile
+
+
+def apply_torch_threads():
+    """Set torch's intra-op and inter-op thread counts from `config` (0 keeps torch's default)."""
+    import torch
+
+    if config.TORCH_THREADS:
+        torch.set_num_threads(config.TORCH_THREADS)
+    if config.TORCH_INTEROP_THREADS:
+        try:
+            torch.set_num_interop_threads(config.TORCH_INTEROP_THREADS)
+        except RuntimeError:
+            # Only settable before the first inter-op parallel work in this process
+            logger.warning("Inter-op threads already started, keeping torch's inter-op thread count")
@@ -0,0 +1,210 @@
+import asyncio
+import logging
+from collections import Counter
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+
+from config import config
+from clip import classify_room_images
+from inference_executor import InferenceExecutor
+from room_object_analysis import analyze_room_images
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Queues items from concurrent callers and runs them through `batch_fn` together.
+
+    A batch is flushed as soon as it holds `max_batch_size` items or the oldest
+    item has waited `max_wait_ms`. Each caller gets its own result back through
+    an asyncio future. Batches run on `executor`, never on the event loop, with
+    up to one batch in flight per executor worker. If a batch fails, its items
+    are retried one at a time so a bad item only fails its own caller.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        executor: InferenceExecutor,
+        max_batch_size: int,
+        max_wait_ms: float
+    ):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight = set()
+
+        # Metrics
+        self.batches = 0
+        self.items = 0
+        self.last_batch_size = 0
+        self.failed_batches = 0
+        self.batch_size_histogram: Counter = Counter()
+
+    async def submit(self, item: Any) -> Any:
+        """Queue an item and wait for its result."""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.executor.workers)
+            self._worker = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._slots.acquire()
+            task = asyncio.create_task(self._flush(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _flush(self, batch: List[tuple]):
+        try:
+            await self._run_batch(batch)
+        finally:
+            self._slots.release()
+
+    async def _run_batch(self, batch: List[tuple]):
+        # Skip callers that gave up while queued
+        batch = [(item, future) for item, future in batch if not future.done()]
+        if not batch:
+            return
+
+        self.batches += 1
+        self.items += len(batch)
+        self.last_batch_size = len(batch)
+        self.batch_size_histogram[len(batch)] += 1
+
+        items = [item for item, _ in batch]
+        try:
+            results = await self.executor.run(self.batch_fn, items)
+        except Exception as e:
+            if len(batch) == 1:
+                item_future = batch[0][1]
+                if not item_future.done():
+                    item_future.set_exception(e)
+                return
+            # Re-run the items one at a time, so only the ones that fail get the error
+            self.failed_batches += 1
+            logger.warning(f"Batch of {len(items)} failed in {self.name}, retrying items one by one: {str(e)}")
+            for item, future in batch:
+                if future.done():
+                    continue
+                try:
+                    result, = await self.executor.run(self.batch_fn, [item])
+                except Exception as item_error:
+                    logger.error(f"Item failed in {self.name}: {str(item_error)}")
+                    if not future.done():
+                        future.set_exception(item_error)
+                    continue
+                if not future.done():
+                    future.set_result(result)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "batches_in_flight": len(self._in_flight),
+            "batches": self.batches,
+            "items": self.items,
+            "last_batch_size": self.last_batch_size,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0,
+            "failed_batches": self.failed_batches,
+            "batch_size_histogram": dict(sorted(self.batch_size_histogram.items())),
+        }
+
+    async def close(self):
+        for task in list(self._in_flight):
+            task.cancel()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+
+class InferenceScheduler:
+    """
+    Cross-request micro-batching for CLIP scene classification and YOLO object analysis.
+
+    Object analysis has one batcher per detector tier, so images for different
+    tiers are never mixed in a batch.
+    """
+
+    def __init__(
+        self,
+        executor: InferenceExecutor,
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None
+    ):
+        self.executor = executor
+        self.max_batch_size = max_batch_size = max_batch_size or config.INFERENCE_MAX_BATCH_SIZE
+        self.max_wait_ms = max_wait_ms = max_wait_ms if max_wait_ms is not None else config.INFERENCE_MAX_WAIT_MS
+        # Batch functions use the registry of whichever process runs them, so they
+        # stay picklable for a process-pool executor
+        self.scene_batcher = MicroBatcher(
+            "scene", classify_room_images, executor, max_batch_size, max_wait_ms
+        )
+        self.objects_batchers: Dict[str, MicroBatcher] = {}
+
+    async def classify_scene(self, image):
+        """Return the (RoomStyle, RoomType) of a decoded image."""
+        return await self.scene_batcher.submit(image)
+
+    def _objects_batcher(self, tier: str) -> MicroBatcher:
+        batcher = self.objects_batchers.get(tier)
+        if batcher is None:
+            batcher = self.objects_batchers[tier] = MicroBatcher(
+                f"objects:{tier}",
+                partial(analyze_room_images, tier=tier),
+                self.executor,
+                self.max_batch_size,
+                self.max_wait_ms
+            )
+        return batcher
+
+    async def analyze_objects(self, image, tier: Optional[str] = None) -> List[dict]:
+        """Return the detected objects and attributes of a decoded image."""
+        return await self._objects_batcher(tier or config.DETECTOR_TIER).submit(image)
+
+    def objects_queue_depth(self, tier: str) -> int:
+        """Number of images waiting for object analysis on a detector tier."""
+        batcher = self.objects_batchers.get(tier)
+        return batcher.metrics()["queue_depth"] if batcher else 0
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "scene": self.scene_batcher.metrics(),
+            "objects": {tier: batcher.metrics() for tier, batcher in self.objects_batchers.items()},
+        }
+
+    async def close(self):
+        await self.scene_batcher.close()
+        for batcher in self.objects_batchers.values():
+            await batcher.close()
@@ -1,15 +1,12 @@
 # main.py
+# Heavy dependencies (torch, transformers, ultralytics, firebase_admin) are
+# imported inside the functions below, so importing this module and
+# answering /health stay fast while models load in the background.
+import asyncio
 import logging
+import time
 from contextlib import asynccontextmanager
-from firebase_admin import credentials, initialize_app, get_app
 from config import config
-from firebase_operations.firebase_manager import FirebaseManager
-from stable_diffusion.img2img_service import StableDiffusionImg2Img
-from stable_diffusion.text2img_service import StableDiffusionText2Img
-from services.similar_images_service import SimilarImagesService
-from pinterest_utils import download_pinterest_image
-from clip import get_clip_embeddings
-from room_object_analysis import analyze_room_objects, create_room_from_analysis
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -23,14 +20,30 @@ logger = logging.getLogger(__name__)
 
 def initialize_firebase():
     """Initialize Firebase if not already initialized."""
+    from firebase_admin import credentials, initialize_app, get_app
     try:
         return get_app()
     except ValueError:
         cred = credentials.Certificate(config.FIREBASE_CREDENTIALS)
         return initialize_app(cred, {'storageBucket': config.FIREBASE_STORAGE_BUCKET})
 
-def get_services():
+def get_services(model_registry, inference_executor):
     """Initialize all required services."""
+    from firebase_operations.firebase_manager import FirebaseManager
+    from stable_diffusion.img2img_service import StableDiffusionImg2Img
+    from stable_diffusion.text2img_service import StableDiffusionText2Img
+    from services.similar_images_service import SimilarImagesService
+    from pinterest_utils import async_download_pinterest_image_bytes
+    from http_client import HTTPClient
+    from download_cache import DownloadCache
+    from analysis_cache import AnalysisResultCache
+    from clip import get_clip_embeddings
+    from room_object_analysis import analyze_room_objects, create_room_from_analysis
+    from inference_scheduler import InferenceScheduler
+    from detector_tiers import DetectorTierSelector, load_tier_profile
+    from services.room_analysis_pipeline import RoomAnalysisPipeline
+    from services.room_analysis_service import RoomAnalysisService
+
     try:
         # Initialize Firebase safely
         firebase_app = initialize_firebase()
@@ -41,6 +54,46 @@ def get_services():
         sd_service = StableDiffusionImg2Img(api_key=config.STABLE_DIFFUSION_API_KEY)
         text2img_service = StableDiffusionText2Img(api_key=config.STABLE_DIFFUSION_API_KEY)
         
+        # Create download cache for repeatedly analyzed pins
+        download_cache = None
+        if config.DOWNLOAD_CACHE_ENABLED:
+            download_cache = DownloadCache(
+                config.DOWNLOAD_CACHE_DIR,
+                max_disk_bytes=config.DOWNLOAD_CACHE_MAX_DISK_BYTES,
+                max_memory_bytes=config.DOWNLOAD_CACHE_MAX_MEMORY_BYTES
+            )
+
+        # Create result cache so near-duplicate images skip analysis
+        analysis_cache = None
+        if config.ANALYSIS_CACHE_ENABLED:
+            analysis_cache = AnalysisResultCache(
+                config.ANALYSIS_CACHE_PATH,
+                max_distance=config.ANALYSIS_CACHE_MAX_DISTANCE
+            )
+
+        # Create inference scheduler for batched room analysis
+        inference_scheduler = InferenceScheduler(inference_executor)
+
+        # Pick detector tiers from the measured per-tier latency and current queue depth
+        tier_selector = DetectorTierSelector(
+            workers=inference_executor.workers,
+            queue_depth=inference_scheduler.objects_queue_depth,
+            profile=load_tier_profile()
+        )
+
+        # Create RoomAnalysisService for the analyze endpoints
+        http_client = HTTPClient()
+        analysis_pipeline = RoomAnalysisPipeline(inference_scheduler)
+        room_analysis_service = RoomAnalysisService(
+            firebase_manager=firebase_manager,
+            http_client=http_client,
+            executor=inference_executor,
+            pipeline=analysis_pipeline,
+            tier_selector=tier_selector,
+            download_cache=download_cache,
+            analysis_cache=analysis_cache
+        )
+
         # Create SimilarImagesService
         similar_service = SimilarImagesService(
             firebase_manager=firebase_manager,
@@ -50,8 +103,17 @@ def get_services():
 
         return {
             'firebase_manager': firebase_manager,
+            'model_registry': model_registry,
+            'inference_executor': inference_executor,
+            'inference_scheduler': inference_scheduler,
+            'tier_selector': tier_selector,
+            'analysis_pipeline': analysis_pipeline,
+            'room_analysis_service': room_analysis_service,
             'similar_service': similar_service,
-            'download_pinterest_image': download_pinterest_image,
+            'http_client': http_client,
+            'download_cache': download_cache,
+            'analysis_cache': analysis_cache,
+            'download_pinterest_image_bytes': async_download_pinterest_image_bytes,
             'get_clip_embeddings': get_clip_embeddings,
             'analyze_room_objects': analyze_room_objects,
             'create_room_from_analysis': create_room_from_analysis
@@ -60,15 +122,67 @@ def get_services():
         logger.error(f"Error initializing services: {str(e)}")
         raise
 
+def load_models():
+    """Create the inference executor and load the models it serves from this process."""
+    from model_registry import get_registry
+    from inference_executor import InferenceExecutor, load_analysis_models
+    from inference_profile import apply_inference_profile, apply_torch_threads
+
+    # Thread counts, executor workers and batch size tuned by autotune.py
+    apply_inference_profile(web_workers=config.WEB_WORKERS)
+    if config.WEB_WORKERS <= 1:
+        # Pre-forked workers already got their share of the CPU in prefork.post_fork_worker
+        apply_torch_threads()
+    inference_executor = InferenceExecutor()
+    if inference_executor.loads_models_in_workers:
+        # Each executor process loads its own models; wait for them before reporting ready
+        inference_executor.prime()
+        model_registry = get_registry()
+    else:
+        # Load and warm the analysis models once for this worker
+        model_registry = load_analysis_models()
+    return model_registry, inference_executor
+
+async def initialize(app: FastAPI):
+    """Load models and build services in the background; /ready reports progress."""
+    startup = app.state.startup
+    try:
+        startup["status"] = "loading models"
+        model_registry, inference_executor = await asyncio.to_thread(load_models)
+        app.state.model_registry = model_registry
+        startup["status"] = "initializing services"
+        app.state.services = await asyncio.to_thread(get_services, model_registry, inference_executor)
+        startup["status"] = "ready"
+        logger.info(f"Startup complete in {time.perf_counter() - startup['started']:.1f}s")
+    except Exception as e:
+        logger.error(f"Startup failed: {str(e)}")
+        startup["status"] = "failed"
+        startup["error"] = str(e)
+    finally:
+        startup["seconds"] = round(time.perf_counter() - startup["started"], 1)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
+    # Startup: start accepting requests right away and initialize in the background
     logger.info("Starting up FastAPI application")
-    # Initialize services
-    app.state.services = get_services()
+    app.state.services = None
+    app.state.model_registry = None
+    app.state.startup = {"status": "starting", "started": time.perf_counter()}
+    startup_task = asyncio.create_task(initialize(app))
     yield
     # Shutdown
     logger.info("Shutting down FastAPI application")
+    startup_task.cancel()
+    services = app.state.services
+    if not services:
+        return
+    await services['inference_scheduler'].close()
+    services['inference_executor'].shutdown()
+    await services['http_client'].aclose()
+    if services['analysis_cache'] is not None:
+        services['analysis_cache'].close()
+    if services['download_cache'] is not None:
+        services['download_cache'].close()
 
 # Create FastAPI app with lifespan
 app = FastAPI(
@@ -100,12 +214,29 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "analyze": "/api/analyze",
+            "analyze_stream": "/api/analyze/stream",
+            "analyze_batch": "/api/analyze/batch",
             "generate": "/api/generate",
             "health": "/health",
+            "ready": "/ready",
             "docs": "/docs"
         }
     })
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="Run the Nectar Room Analysis API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers", type=int, default=config.WEB_WORKERS,
+        help="More than one loads the models once and forks workers that share them"
+    )
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        from prefork import serve
+        serve("main:app", host=args.host, port=args.port, workers=args.workers)
+    else:
+        import uvicorn
+        uvicorn.run("main:app", host=args.host, port=args.port, reload=True)
\ No newline at end of file
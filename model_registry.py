@@ -0,0 +1,348 @@
+import logging
+import math
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import torch
+from PIL import Image
+from transformers import CLIPModel, CLIPProcessor
+from ultralytics import YOLO
+
+from config import config
+from detector_tiers import UnknownDetectorTierError, detector_tiers
+from exported_models import ExportedClip, load_manifest
+from text_embedding_bank import TextEmbeddingBank
+
+logger = logging.getLogger(__name__)
+
+
+def _rss_bytes() -> int:
+    """Return the current resident set size of this process in bytes."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # Not on Linux: fall back to the peak RSS, which is the best we have
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _tensor_bytes(module: torch.nn.Module) -> int:
+    """Return the memory held by a module's parameters and buffers in bytes."""
+    if not isinstance(module, torch.nn.Module):
+        return 0  # Exported detectors are served outside PyTorch
+    tensors = list(module.parameters()) + list(module.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+def _cpu_supports_bf16() -> bool:
+    """Whether this CPU has native bf16 matmul (AVX512-BF16 or AMX), where bf16 is faster than fp32."""
+    is_supported = getattr(torch.ops.mkldnn, "_is_mkldnn_bf16_supported", None)
+    try:
+        return bool(is_supported()) if is_supported else False
+    except RuntimeError:
+        return False
+
+
+class ModelRegistry:
+    """
+    Process-wide owner of the analysis models.
+
+    CLIP and YOLO are loaded once and shared by `get_clip_embeddings` and
+    `analyze_room_objects`, instead of being reloaded from disk on every call.
+    """
+
+    def __init__(
+        self,
+        clip_model_name: Optional[str] = None,
+        detector_tier: Optional[str] = None,
+        clip_precision: Optional[str] = None,
+        runtime: Optional[str] = None
+    ):
+        self.clip_model_name = clip_model_name or config.CLIP_MODEL_NAME
+        self.runtime = runtime or config.MODEL_RUNTIME
+        self._exported: Optional[ExportedClip] = None
+        self.clip_precision = clip_precision or config.CLIP_PRECISION
+        self.clip_dtype = torch.float32
+        self.detector_tier = detector_tier or config.DETECTOR_TIER
+        self._clip_model = None
+        self._clip_processor = None
+        self._detectors: Dict[str, YOLO] = {}
+        self._stats: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self.text_bank = TextEmbeddingBank(config.TEXT_EMBEDDING_CACHE_DIR)
+
+    def load(self) -> "ModelRegistry":
+        """Load CLIP and the default detector tier, if not loaded yet."""
+        with self._lock:
+            if self._clip_processor is None:
+                self._load_clip()
+            if self.detector_tier not in self._detectors:
+                self._load_detector(self.detector_tier)
+        return self
+
+    def _load_clip(self):
+        if self.runtime == "exported":
+            self._load_exported_clip()
+            return
+        if self.runtime != "pytorch":
+            raise ValueError(f"Unknown model runtime: {self.runtime}")
+
+        start, rss_before = time.perf_counter(), _rss_bytes()
+        model = CLIPModel.from_pretrained(self.clip_model_name)
+        model.eval()
+        model = self._apply_precision(model)
+        self._clip_processor = CLIPProcessor.from_pretrained(self.clip_model_name)
+        self._clip_model = model
+        self._record("clip", self.clip_model_name, start, rss_before, _tensor_bytes(model))
+        self._stats["clip"]["precision"] = self.clip_precision
+
+    def _load_exported_clip(self):
+        manifest = load_manifest()
+        if manifest is None:
+            raise RuntimeError(f"No exported models in {config.EXPORT_DIR}, run export_models.py first")
+        if manifest["clip_model_name"] != self.clip_model_name:
+            raise RuntimeError(
+                f"Exported CLIP is {manifest['clip_model_name']}, expected {self.clip_model_name}"
+            )
+        if self.clip_precision != "fp32":
+            logger.warning(f"Exported CLIP runs in fp32, ignoring CLIP_PRECISION={self.clip_precision}")
+            self.clip_precision = "fp32"
+
+        start, rss_before = time.perf_counter(), _rss_bytes()
+        self._exported = ExportedClip(manifest)
+        self._clip_processor = CLIPProcessor.from_pretrained(self.clip_model_name)
+        self._record("clip", f"{self.clip_model_name} ({self._exported.format})", start, rss_before, 0)
+        self._stats["clip"]["precision"] = self.clip_precision
+
+    def _apply_precision(self, model: CLIPModel) -> CLIPModel:
+        """Convert a freshly loaded fp32 CLIP model to the configured inference precision."""
+        if self.clip_precision == "int8":
+            # Dynamic quantization: int8 weights, activations quantized per batch
+            return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        if self.clip_precision == "bf16":
+            if not _cpu_supports_bf16():
+                logger.warning("CPU has no native bf16 support, running CLIP in fp32")
+                self.clip_precision = "fp32"
+                return model
+            self.clip_dtype = torch.bfloat16
+            return model.to(torch.bfloat16)
+        if self.clip_precision != "fp32":
+            raise ValueError(f"Unknown CLIP precision: {self.clip_precision}")
+        return model
+
+    def _load_detector(self, tier: str):
+        weights = detector_tiers().get(tier)
+        if weights is None:
+            raise UnknownDetectorTierError(f"Unknown detector tier: {tier}")
+        if self.runtime == "exported":
+            exported = (load_manifest() or {}).get("yolo", {}).get(tier)
+            if exported:
+                weights = os.path.join(config.EXPORT_DIR, exported)
+            else:
+                logger.warning(f"Detector tier {tier} was not exported, serving it from PyTorch")
+        start, rss_before = time.perf_counter(), _rss_bytes()
+        detector = YOLO(weights, task="detect")
+        self._detectors[tier] = detector
+        self._record(f"yolo:{tier}", weights, start, rss_before, _tensor_bytes(detector.model))
+
+    def _record(self, name: str, source: str, start: float, rss_before: int, tensor_bytes: int):
+        load_seconds = time.perf_counter() - start
+        self._stats[name] = {
+            "source": source,
+            "load_seconds": round(load_seconds, 3),
+            "parameter_memory_mb": round(tensor_bytes / 2**20, 1),
+            "rss_delta_mb": round((_rss_bytes() - rss_before) / 2**20, 1),
+            "warmup_seconds": None,
+        }
+        logger.info(f"Loaded {name} ({source}) in {load_seconds:.2f}s")
+
+    def warmup(self):
+        """Run a dummy forward pass through each model so the first request is not slow."""
+        self.load()
+        dummy = Image.new("RGB", (640, 640))
+
+        start = time.perf_counter()
+        self._encode_texts(["warmup"])
+        self.encode_images([dummy])
+        self._stats["clip"]["warmup_seconds"] = round(time.perf_counter() - start, 3)
+
+        for tier, detector in list(self._detectors.items()):
+            start = time.perf_counter()
+            detector(dummy, verbose=False)
+            self._stats[f"yolo:{tier}"]["warmup_seconds"] = round(time.perf_counter() - start, 3)
+        logger.info("Model warmup complete")
+
+    def _encode_texts(self, prompts: List[str]) -> torch.Tensor:
+        inputs = self.clip_processor(text=prompts, return_tensors="pt", padding=True, truncation=True)
+        if self._exported is not None:
+            return self._exported.text_features(inputs["input_ids"], inputs["attention_mask"])
+        with torch.no_grad():
+            return self.clip_model.get_text_features(**inputs).float()
+
+    def encode_images(self, images: List[Image.Image], max_batch_size: Optional[int] = None) -> torch.Tensor:
+        """
+        Return normalized CLIP image embeddings for `images`, one row per image.
+
+        Images are preprocessed and encoded in batches of at most
+        `max_batch_size`, which bounds peak memory on images with many objects.
+        """
+        max_batch_size = max_batch_size or config.CLIP_MAX_BATCH_SIZE
+        batches = []
+        for start in range(0, len(images), max_batch_size):
+            inputs = self.clip_processor(images=images[start:start + max_batch_size], return_tensors="pt")
+            if self._exported is not None:
+                features = self._exported.image_features(inputs["pixel_values"])[0]
+            else:
+                with torch.no_grad():
+                    features = self.clip_model.get_image_features(
+                        pixel_values=inputs["pixel_values"].to(self.clip_dtype)
+                    ).float()
+            batches.append(features / features.norm(dim=-1, keepdim=True))
+        if not batches:
+            return torch.empty((0, self.projection_dim))
+        return torch.cat(batches)
+
+    def encode_image_regions(self, images: List[Image.Image], boxes: List[np.ndarray]) -> torch.Tensor:
+        """
+        Return normalized CLIP embeddings for boxes, from one vision pass per image.
+
+        Each image is resized to the CLIP input square without cropping, so
+        every box stays in view. The patch tokens under a box are averaged and
+        projected into the joint embedding space like the class token would be.
+
+        Args:
+            images: Decoded PIL images
+            boxes: Per image, an array of (x1, y1, x2, y2) boxes in that image's pixels
+
+        Returns:
+            torch.Tensor: One row per box, in image then box order
+        """
+        if self._exported is not None:
+            side, patch_size = self._exported.image_size, self._exported.patch_size
+        else:
+            vision_config = self.clip_model.config.vision_config
+            side, patch_size = vision_config.image_size, vision_config.patch_size
+        grid = side // patch_size
+        max_batch_size = config.CLIP_MAX_BATCH_SIZE
+
+        pooled = []
+        for start in range(0, len(images), max_batch_size):
+            chunk = images[start:start + max_batch_size]
+            inputs = self.clip_processor(
+                images=[image.convert("RGB").resize((side, side), Image.BICUBIC) for image in chunk],
+                return_tensors="pt",
+                do_resize=False,
+                do_center_crop=False
+            )
+            if self._exported is not None:
+                hidden = self._exported.image_features(inputs["pixel_values"])[1]
+            else:
+                with torch.no_grad():
+                    hidden = self.clip_model.vision_model(
+                        pixel_values=inputs["pixel_values"].to(self.clip_dtype)
+                    ).last_hidden_state
+            # Drop the class token and lay the patch tokens out on their grid
+            patches = hidden[:, 1:, :].reshape(len(chunk), grid, grid, -1)
+
+            for image, image_patches, image_boxes in zip(chunk, patches, boxes[start:start + max_batch_size]):
+                width, height = image.size
+                for x1, y1, x2, y2 in image_boxes:
+                    col1 = min(int(x1 / width * grid), grid - 1)
+                    row1 = min(int(y1 / height * grid), grid - 1)
+                    col2 = max(col1 + 1, min(math.ceil(x2 / width * grid), grid))
+                    row2 = max(row1 + 1, min(math.ceil(y2 / height * grid), grid))
+                    pooled.append(image_patches[row1:row2, col1:col2].mean(dim=(0, 1)))
+
+        if not pooled:
+            return torch.empty((0, self.projection_dim))
+        if self._exported is not None:
+            features = self._exported.project_regions(torch.stack(pooled))
+        else:
+            with torch.no_grad():
+                features = self.clip_model.visual_projection(
+                    self.clip_model.vision_model.post_layernorm(torch.stack(pooled))
+                ).float()
+        return features / features.norm(dim=-1, keepdim=True)
+
+    def text_embeddings(self, prompts: List[str]) -> torch.Tensor:
+        """Return normalized CLIP text embeddings for a fixed prompt list from the embedding bank."""
+        if self._clip_processor is None:
+            self.load()  # Settles the precision, which falls back to fp32 without CPU bf16 support
+        # Other precisions and runtimes produce slightly different embeddings, so they get their own bank entries
+        model_key = self.clip_model_name
+        if self.clip_precision != "fp32":
+            model_key = f"{model_key}-{self.clip_precision}"
+        if self.runtime != "pytorch":
+            model_key = f"{model_key}-{self.runtime}"
+        return self.text_bank.get(model_key, prompts, self._encode_texts)
+
+    def preload_text_embeddings(self, prompt_sets: List[List[str]]):
+        """Compute or load the embedding bank for every prompt list used on the hot path."""
+        for prompts in prompt_sets:
+            self.text_embeddings(prompts)
+
+    @property
+    def clip_model(self) -> CLIPModel:
+        """The PyTorch CLIP model; None when serving an exported runtime."""
+        if self._clip_processor is None:
+            self.load()
+        return self._clip_model
+
+    @property
+    def projection_dim(self) -> int:
+        if self._exported is not None:
+            return self._exported.projection_dim
+        return self.clip_model.config.projection_dim
+
+    @property
+    def logit_scale(self) -> torch.Tensor:
+        """CLIP's learned temperature, exp(logit_scale)."""
+        if self._clip_processor is None:
+            self.load()
+        if self._exported is not None:
+            return self._exported.logit_scale
+        return self._clip_model.logit_scale.exp()
+
+    @property
+    def clip_processor(self) -> CLIPProcessor:
+        if self._clip_processor is None:
+            self.load()
+        return self._clip_processor
+
+    @property
+    def yolo(self) -> YOLO:
+        return self.detector()
+
+    def detector(self, tier: Optional[str] = None) -> YOLO:
+        """Return the YOLO detector of a tier (default tier if None), loading it on first use."""
+        tier = tier or self.detector_tier
+        if tier not in self._detectors:
+            with self._lock:
+                if tier not in self._detectors:
+                    self._load_detector(tier)
+        return self._detectors[tier]
+
+    def detector_modules(self) -> List[torch.nn.Module]:
+        """The PyTorch modules of the detectors loaded so far (exported detectors have none)."""
+        return [detector.model for detector in self._detectors.values() if isinstance(detector.model, torch.nn.Module)]
+
+    def stats(self) -> Dict[str, dict]:
+        """Load time and memory per model, as reported by `/health`."""
+        return {name: dict(stats) for name, stats in self._stats.items()}
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ModelRegistry:
+    """Return the process-wide model registry, creating it on first use."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
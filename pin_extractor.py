@@ -0,0 +1,113 @@
+import json
+import re
+from typing import Dict, Optional
+
+from config import config
+
+# Widths Pinterest serves under https://i.pinimg.com/<width>x/...
+PINIMG_WIDTHS = [236, 474, 564, 736, 1200]
+
+_PINIMG_SIZE_SEGMENT = re.compile(r"^(https?://i\.pinimg\.com/)(\d+x\d*|originals)(/.+)$")
+_OG_IMAGE_PATTERNS = [
+    re.compile(r"""<meta[^>]+(?:property|name)=["']og:image["'][^>]*?content=["']([^"']+)["']""", re.I),
+    re.compile(r"""<meta[^>]+content=["']([^"']+)["'][^>]*?(?:property|name)=["']og:image["']""", re.I),
+]
+# The "images" object of the embedded pin JSON, e.g. {"236x": {"url": ...}, "736x": {...}, "orig": {...}}
+_PIN_JSON_IMAGES = re.compile(r'"images"\s*:\s*(\{(?:[^{}]|\{[^{}]*\})*\})')
+_IMG_SRC = re.compile(r"""<img[^>]+src=["']([^"']+)["']""", re.I)
+
+# Keep enough of the previous chunk that a tag split across chunks still matches
+_SCAN_OVERLAP = 4096
+
+
+def _unescape(url: str) -> str:
+    return url.replace("\\u002F", "/").replace("\\/", "/").replace("&amp;", "&")
+
+
+def pin_image_target_side() -> int:
+    """Side the downloaded pin image should cover: `PIN_IMAGE_TARGET_SIDE`, else the model input size."""
+    return config.PIN_IMAGE_TARGET_SIDE or config.IMAGE_DECODE_MAX_SIDE
+
+
+def select_image_variant(image_url: str, target_side: int) -> str:
+    """
+    Rewrite a pinimg URL to the smallest served width that still covers
+    `target_side`, instead of a tiny thumbnail or the full-size original.
+    Non-pinimg URLs are returned unchanged.
+    """
+    match = _PINIMG_SIZE_SEGMENT.match(image_url)
+    if not match:
+        return image_url
+
+    width = next((w for w in PINIMG_WIDTHS if w >= target_side), PINIMG_WIDTHS[-1])
+    return f"{match.group(1)}{width}x{match.group(3)}"
+
+
+def choose_variant(variants: Dict[str, dict], target_side: int) -> Optional[str]:
+    """Pick the best image URL from the pin JSON `images` object for a model input of `target_side`."""
+    sized = []
+    for name, variant in variants.items():
+        if not isinstance(variant, dict) or not variant.get("url"):
+            continue
+        width = variant.get("width")
+        if not isinstance(width, int):
+            size = re.match(r"(\d+)x", name)
+            width = int(size.group(1)) if size else None
+        if width:
+            sized.append((width, name == "orig", variant["url"]))
+
+    if not sized:
+        return None
+
+    # Smallest variant at least as large as the target, preferring a resized copy over the original
+    large_enough = sorted(v for v in sized if v[0] >= target_side)
+    width, _, url = large_enough[0] if large_enough else max(sized)
+    return _unescape(url)
+
+
+class PinPageScanner:
+    """
+    Incrementally scans a streamed Pinterest pin page for the pin image.
+
+    Feed decoded text as it arrives; `feed` returns the image URL as soon as an
+    `og:image` meta tag or the embedded pin JSON `images` object has been seen,
+    so the caller can stop reading the page. `finish` falls back to the first
+    `<img src>` once the whole page has been read.
+    """
+
+    def __init__(self, target_side: int):
+        self.target_side = target_side
+        self._buffer = ""
+        self._scanned = 0
+
+    def feed(self, text: str) -> Optional[str]:
+        self._buffer += text
+        window = self._buffer[max(0, self._scanned - _SCAN_OVERLAP):]
+        self._scanned = len(self._buffer)
+
+        for pattern in _OG_IMAGE_PATTERNS:
+            match = pattern.search(window)
+            if match:
+                return select_image_variant(_unescape(match.group(1)), self.target_side)
+
+        for match in _PIN_JSON_IMAGES.finditer(window):
+            try:
+                variants = json.loads(match.group(1))
+            except ValueError:
+                continue
+            image_url = choose_variant(variants, self.target_side)
+            if image_url:
+                return image_url
+        return None
+
+    def finish(self) -> Optional[str]:
+        match = _IMG_SRC.search(self._buffer)
+        if match:
+            return select_image_variant(_unescape(match.group(1)), self.target_side)
+        return None
+
+
+def extract_image_url_from_html(html: str, target_side: int) -> Optional[str]:
+    """Extract the best pin image URL from a complete pin page."""
+    scanner = PinPageScanner(target_side)
+    return scanner.feed(html) or scanner.finish()
@@ -1,5 +1,14 @@
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+import codecs
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from config import config
+from download_cache import DownloadCache, normalize_pin_key
+from http_client import HTTPClient
+from pin_extractor import PinPageScanner, pin_image_target_side
+
+logger = logging.getLogger(__name__)
 
 
 def download_pinterest_image(pin_url, save_path="image.jpg"):
@@ -14,44 +23,138 @@ def download_pinterest_image(pin_url, save_path="image.jpg"):
         str: A success message with the saved path, or an error message.
     """
     try:
-        # Extract the direct image URL
-        image_url = extract_image_url(pin_url)
-        if not image_url:
-            return "Failed to extract image URL."
-
-        # Download the image
-        response = requests.get(image_url)
-        if response.status_code == 200:
-            with open(save_path, "wb") as file:
-                file.write(response.content)
-            return f"Image downloaded and saved as {save_path}"
-        else:
-            return f"Failed to download image. Status code: {response.status_code}"
+        image_bytes = download_pinterest_image_bytes(pin_url)
+        if image_bytes is None:
+            return "Failed to download image."
+
+        with open(save_path, "wb") as file:
+            file.write(image_bytes)
+        return f"Image downloaded and saved as {save_path}"
     except Exception as e:
         return f"An error occurred: {e}"
 
 
+def download_pinterest_image_bytes(pin_url):
+    """
+    Extract and download the image from a Pinterest Pin URL into memory.
+
+    Synchronous wrapper over `async_download_pinterest_image_bytes` for CLI use.
+
+    Args:
+        pin_url (str): The Pinterest Pin URL.
+
+    Returns:
+        bytes: The raw image bytes, or None if the image could not be downloaded.
+    """
+    return _run_sync(_with_client(async_download_pinterest_image_bytes, pin_url))
+
+
 def extract_image_url(pin_url):
     """
     Extract the direct image URL from a Pinterest Pin URL.
 
+    Synchronous wrapper over `async_extract_image_url` for CLI use.
+
     Args:
         pin_url (str): The Pinterest Pin URL.
 
     Returns:
         str: The direct image URL, or None if not found.
     """
+    return _run_sync(_with_client(async_extract_image_url, pin_url))
+
+
+def _run_sync(coro):
+    """Run a coroutine to completion, even when called from inside a running event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    # Called from async code (e.g. test_e2e_flow): run on a separate thread with its own loop
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+async def _with_client(fn, pin_url):
+    client = HTTPClient()
     try:
-        # Fetch the Pinterest page
-        response = requests.get(pin_url)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, "html.parser")
-
-            # Search for image tags with a valid 'src' attribute
-            img_tag = soup.find("img", {"src": True})
-            if img_tag:
-                return img_tag["src"]
+        return await fn(pin_url, client)
+    finally:
+        await client.aclose()
+
+
+async def async_download_pinterest_image_bytes(pin_url, client: HTTPClient, cache: Optional[DownloadCache] = None):
+    """
+    Extract and download the image from a Pinterest Pin URL into memory.
+
+    Args:
+        pin_url (str): The Pinterest Pin URL.
+        client (HTTPClient): Shared pooled HTTP client.
+        cache (DownloadCache): Optional cache checked before, and filled after, downloading.
+
+    Returns:
+        bytes: The raw image bytes, or None if the image could not be downloaded.
+    """
+    try:
+        cache_key = normalize_pin_key(pin_url)
+        if cache is not None:
+            try:
+                image_bytes = await asyncio.to_thread(cache.get, cache_key)
+            except Exception as e:
+                # A broken cache only costs the download
+                logger.error(f"Download cache lookup failed for {cache_key}: {e}")
+                image_bytes = None
+            if image_bytes is not None:
+                return image_bytes
+
+        # Extract the direct image URL
+        image_url = await async_extract_image_url(pin_url, client)
+        if not image_url:
+            logger.warning(f"Failed to extract image URL from {pin_url}")
+            return None
+
+        # Stream the image into memory
+        image_bytes = await client.fetch_bytes(image_url)
+        if cache is not None:
+            try:
+                await asyncio.to_thread(cache.put, cache_key, image_bytes)
+            except Exception as e:
+                logger.error(f"Failed to cache the image for {cache_key}: {e}")
+        return image_bytes
+    except Exception as e:
+        logger.error(f"An error occurred while downloading the image: {e}")
         return None
+
+
+async def async_extract_image_url(pin_url, client: HTTPClient):
+    """
+    Extract the direct image URL from a Pinterest Pin URL.
+
+    The page is streamed and scanning stops as soon as the `og:image` tag or
+    the embedded pin JSON is found. The smallest image variant covering the
+    model input (see `pin_image_target_side`) is chosen.
+
+    Args:
+        pin_url (str): The Pinterest Pin URL.
+        client (HTTPClient): Shared pooled HTTP client.
+
+    Returns:
+        str: The direct image URL, or None if not found.
+    """
+    scanner = PinPageScanner(target_side=pin_image_target_side())
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    chunks = client.stream(pin_url, max_bytes=config.HTTP_MAX_PAGE_BYTES)
+    try:
+        # Fetch the Pinterest page until the image is found
+        async for chunk in chunks:
+            image_url = scanner.feed(decoder.decode(chunk))
+            if image_url:
+                return image_url
+        return scanner.finish()
     except Exception as e:
-        print(f"An error occurred while extracting the image URL: {e}")
+        logger.error(f"An error occurred while extracting the image URL: {e}")
         return None
+    finally:
+        # Closing the stream early drops the rest of the page
+        await chunks.aclose()
@@ -0,0 +1,147 @@
+"""
+Pre-fork serving: load the analysis models once in a master process and fork
+web workers that share them copy-on-write.
+
+    python main.py --workers 4
+    python prefork.py report <master pid>    # unique vs shared memory per worker
+"""
+import gc
+import logging
+import os
+import sys
+from typing import Dict, List
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+_SMAPS_FIELDS = ["Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty"]
+
+
+def preload_models():
+    """
+    Load the analysis models in the master process, ready to be shared by forked workers.
+
+    Runs single-threaded so torch does not start its intra-op thread pool
+    before fork, which would deadlock the children. The models are warmed
+    here: ultralytics builds its predictor on the first prediction and fuses
+    Conv+BN into new weight tensors, so a detector first run in a worker would
+    be fused into that worker's private copy. Parameters are frozen so no
+    worker writes to (and un-shares) the weight pages. Finally every object
+    allocated so far is moved to the GC's permanent generation, so workers'
+    garbage collections do not touch, and copy, the pages holding them.
+    """
+    import torch
+    from inference_executor import load_analysis_models
+
+    torch.set_num_threads(1)
+    registry = load_analysis_models()
+    for module in (registry.clip_model, *registry.detector_modules()):
+        if isinstance(module, torch.nn.Module):
+            module.requires_grad_(False)
+    gc.collect()
+    gc.freeze()
+    logger.info(f"Preloaded analysis models in master {os.getpid()}, froze {gc.get_freeze_count()} objects")
+    return registry
+
+
+def post_fork_worker(workers: int):
+    """Per-worker torch setup after fork: split the CPU between workers."""
+    import torch
+
+    threads = config.PREFORK_TORCH_THREADS or config.TORCH_THREADS or max(1, (os.cpu_count() or 1) // workers)
+    torch.set_num_threads(threads)
+    logger.info(f"Worker {os.getpid()} using {threads} torch threads")
+
+
+def smaps_rollup(pid: int) -> Dict[str, int]:
+    """Return a process's memory counters from /proc/<pid>/smaps_rollup in bytes."""
+    counters = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in _SMAPS_FIELDS:
+                counters[name] = int(value.split()[0]) * 1024
+    return counters
+
+
+def memory_summary(pid: int) -> Dict[str, float]:
+    """
+    Unique (private) and shared resident memory of a process in MB.
+
+    `pss_mb` charges each shared page to its sharers proportionally, so the
+    PSS of the master plus all workers is the real footprint of the server.
+    """
+    counters = smaps_rollup(pid)
+    to_mb = lambda value: round(value / 2**20, 1)
+    return {
+        "rss_mb": to_mb(counters["Rss"]),
+        "pss_mb": to_mb(counters["Pss"]),
+        "unique_mb": to_mb(counters["Private_Clean"] + counters["Private_Dirty"]),
+        "shared_mb": to_mb(counters["Shared_Clean"] + counters["Shared_Dirty"]),
+    }
+
+
+def _children(pid: int) -> List[int]:
+    children = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        try:
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                children.extend(int(child) for child in f.read().split())
+        except OSError:
+            continue
+    return children
+
+
+def memory_report(master_pid: int) -> str:
+    """Format unique vs shared memory of a pre-fork master and its workers."""
+    rows = [("master", master_pid)] + [("worker", pid) for pid in _children(master_pid)]
+    lines = [f"{'process':<8} {'pid':>7} {'RSS MB':>9} {'unique MB':>10} {'shared MB':>10} {'PSS MB':>9}"]
+    total_pss = total_rss = 0
+    for role, pid in rows:
+        summary = memory_summary(pid)
+        total_pss += summary["pss_mb"]
+        total_rss += summary["rss_mb"]
+        lines.append(
+            f"{role:<8} {pid:>7} {summary['rss_mb']:>9.1f} {summary['unique_mb']:>10.1f} "
+            f"{summary['shared_mb']:>10.1f} {summary['pss_mb']:>9.1f}"
+        )
+    lines.append(f"Total footprint (sum of PSS): {total_pss:.1f} MB, sum of RSS: {total_rss:.1f} MB")
+    return "\n".join(lines)
+
+
+def serve(app_path: str, host: str, port: int, workers: int):
+    """Preload the models, then serve `app_path` from `workers` forked gunicorn/uvicorn workers."""
+    from gunicorn.app.base import BaseApplication
+
+    from inference_profile import apply_inference_profile
+
+    if config.INFERENCE_EXECUTOR != "thread":
+        raise SystemExit("Pre-fork serving shares models across workers and needs INFERENCE_EXECUTOR=thread")
+    # Applied in the master, split between the workers, so forked workers inherit
+    # their share of the tuned settings; load_models in each worker sees the same
+    config.WEB_WORKERS = workers
+    apply_inference_profile(web_workers=workers)
+    if not config.INFERENCE_WORKERS:
+        config.INFERENCE_WORKERS = max(1, (os.cpu_count() or 1) // workers)
+
+    class PreforkApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{host}:{port}")
+            self.cfg.set("workers", workers)
+            self.cfg.set("worker_class", "uvicorn.workers.UvicornWorker")
+            self.cfg.set("preload_app", True)
+            self.cfg.set("post_fork", lambda server, worker: post_fork_worker(workers))
+
+        def load(self):
+            preload_models()
+            module_name, _, attribute = app_path.partition(":")
+            return getattr(__import__(module_name), attribute)
+
+    PreforkApplication().run()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "report":
+        raise SystemExit("usage: python prefork.py report <master pid>")
+    print(memory_report(int(sys.argv[2])))
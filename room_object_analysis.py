@@ -1,82 +1,197 @@
-from transformers import CLIPProcessor, CLIPModel
+import numpy as np
 import torch
-from PIL import Image
-from ultralytics import YOLO
 from datetime import datetime
+from typing import Dict, List
+from config import config
+from decoded_image import DecodedImage
+from model_registry import ModelRegistry, get_registry
 from models.room import Room, RoomStyle, RoomMetadata, MaterialFinish, RoomFurniture, FurniturePiece, FurnitureMaterial, RoomType, FixtureMaterials, Lighting, LightingType, FurnitureType, RoomType
 
-def analyze_room_objects(image_path):
-    # Load the object detection model (YOLO)
-    object_detector = YOLO("yolov8x.pt")  # Use a lightweight YOLOv8 model
-    # object_detector = YOLO('runs/detect/yolov8_home_decor8/weights/best.pt')  # Update with the correct path
-
-    # Load the style and texture classification model (CLIP)
-    model = CLIPModel.from_pretrained("openai/clip-vit-base-patch32")
-    processor = CLIPProcessor.from_pretrained("openai/clip-vit-base-patch32")
-
-    # Define styles, textures/materials, and colors for objects
-    styles = ["modern", "imperial", "rustic", "minimalist", "industrial", "vintage", "luxury"]
-    materials = ["wood", "metal", "fabric", "glass", "plastic", "marble", "ceramic"]
-    colors = ["red", "blue", "green", "yellow", "black", "white", "gray", "beige", "brown"]
-
-    # Load and process the room image
-    image = Image.open(image_path)
-
-    # Detect objects in the image using YOLO
-    results = object_detector(image_path)
-    objects = results[0].boxes.data.cpu().numpy()  # Extract bounding boxes and class information
-
-    # Initialize results
-    detected_objects = []
-
-    # Process each detected object
-    for obj in objects:
-        # Extract bounding box and crop the object from the image
-        x1, y1, x2, y2, conf, class_id = obj
-        class_name = results[0].names[int(class_id)]  # Get the object name from YOLO
-        cropped_object = image.crop((x1, y1, x2, y2))
-
-        # Generate text descriptions for style, material, and color
-        descriptions = [
-            f"{style} {material} object in {color} color"
-            for style in styles
-            for material in materials
-            for color in colors
-        ]
-
-        # Compute text embeddings for the descriptions
-        text_inputs = processor(text=descriptions, return_tensors="pt", padding=True, truncation=True)
-        with torch.no_grad():
-            text_features = model.get_text_features(**text_inputs)
-        text_features /= text_features.norm(dim=-1, keepdim=True)  # Normalize
-
-        # Compute image embeddings for the cropped object
-        object_inputs = processor(images=cropped_object, return_tensors="pt")
-        with torch.no_grad():
-            object_features = model.get_image_features(**object_inputs)
-        object_features /= object_features.norm(dim=-1, keepdim=True)  # Normalize
-
-        # Find the best matching style, material, and color
-        similarities = torch.matmul(object_features, text_features.T)
-        best_match_idx = torch.argmax(similarities, dim=1)
-        best_description = descriptions[best_match_idx.item()]
-
-        # Store the detected object and its attributes
-        detected_objects.append({
-            "bounding_box": (x1, y1, x2, y2),
-            "confidence": conf,
-            "class_id": class_id,
-            "class_name": class_name,
-            "attributes": best_description
-        })
-
-    # Return the detected objects and their attributes
-    for obj in detected_objects:
-        print(f"Object ({obj['class_name']}): {obj['bounding_box']}, "
-              f"Confidence: {obj['confidence']:.2f}, "
-              f"Attributes: {obj['attributes']}")
+# Define styles, textures/materials, and colors for objects
+OBJECT_STYLES = ["modern", "imperial", "rustic", "minimalist", "industrial", "vintage", "luxury"]
+OBJECT_MATERIALS = ["wood", "metal", "fabric", "glass", "plastic", "marble", "ceramic"]
+OBJECT_COLORS = ["red", "blue", "green", "yellow", "black", "white", "gray", "beige", "brown"]
+
+# Each attribute is scored by its own prompt bank instead of the full
+# style x material x color product, so adding a style costs one prompt row
+ATTRIBUTE_LABELS = {
+    "style": OBJECT_STYLES,
+    "material": OBJECT_MATERIALS,
+    "color": OBJECT_COLORS,
+}
+ATTRIBUTE_PROMPTS = {
+    "style": [f"{style} style object" for style in OBJECT_STYLES],
+    "material": [f"object made of {material}" for material in OBJECT_MATERIALS],
+    "color": [f"object in {color} color" for color in OBJECT_COLORS],
+}
+
+
+def filter_detections(objects: np.ndarray, class_names: Dict[int, str], image_size) -> np.ndarray:
+    """
+    Drop YOLO detections that are not worth describing, before any crop is encoded.
+
+    Keeps boxes at or above the confidence floor, covering at least the minimum
+    fraction of the image, whose class is on the allow-list, and of those only
+    the most confident few.
+
+    Args:
+        objects (np.ndarray): YOLO rows of (x1, y1, x2, y2, confidence, class_id)
+        class_names (dict): Class id to name mapping of the detector
+        image_size (tuple): (width, height) of the image the boxes refer to
+
+    Returns:
+        np.ndarray: The kept rows, most confident first
+    """
+    width, height = image_size
+    areas = (objects[:, 2] - objects[:, 0]) * (objects[:, 3] - objects[:, 1])
+    keep = (objects[:, 4] >= config.DETECTION_MIN_CONFIDENCE) & (
+        areas >= config.DETECTION_MIN_AREA_RATIO * width * height
+    )
+
+    # The allow-list names COCO classes; a fine-tuned home-decor detector has
+    # none of them and only home-decor classes, so it is left unfiltered
+    allowed = config.DETECTION_CLASS_ALLOWLIST
+    if allowed and allowed & set(class_names.values()):
+        allowed_ids = [class_id for class_id, name in class_names.items() if name in allowed]
+        keep &= np.isin(objects[:, 5].astype(int), allowed_ids)
+
+    kept = objects[keep]
+    return kept[np.argsort(-kept[:, 4], kind="stable")][:config.DETECTION_MAX_OBJECTS]
+
+
+def classify_object_attributes(object_features: torch.Tensor, registry: ModelRegistry, top_k: int = None) -> List[Dict]:
+    """
+    Score normalized object embeddings against each attribute head independently.
+
+    Args:
+        object_features (torch.Tensor): Normalized CLIP image embeddings, one row per object
+        registry (ModelRegistry): Registry providing the CLIP model and prompt banks
+        top_k (int): Number of ranked labels to return per attribute
 
-    return detected_objects
+    Returns:
+        List[Dict]: Per-object attributes with label, confidence and top-k for each head
+    """
+    top_k = top_k or config.ATTRIBUTE_TOP_K
+    attributes = [{} for _ in range(len(object_features))]
+    if not attributes:
+        return attributes
+
+    with torch.no_grad():
+        logit_scale = registry.logit_scale
+        for head, labels in ATTRIBUTE_LABELS.items():
+            text_features = registry.text_embeddings(ATTRIBUTE_PROMPTS[head])
+            probabilities = (logit_scale * object_features @ text_features.T).softmax(dim=-1)
+            confidences, indices = probabilities.topk(min(top_k, len(labels)), dim=-1)
+
+            for obj_attributes, obj_confidences, obj_indices in zip(attributes, confidences.tolist(), indices.tolist()):
+                ranked = [
+                    {"label": labels[idx], "confidence": round(conf, 4)}
+                    for idx, conf in zip(obj_indices, obj_confidences)
+                ]
+                obj_attributes[head] = {**ranked[0], "top_k": ranked}
+
+    for obj_attributes in attributes:
+        obj_attributes["description"] = (
+            f"{obj_attributes['style']['label']} {obj_attributes['material']['label']} "
+            f"object in {obj_attributes['color']['label']} color"
+        )
+    return attributes
+
+
+def encode_objects(images, image_objects, registry: ModelRegistry, attribute_mode: str = None) -> torch.Tensor:
+    """
+    Compute normalized CLIP embeddings for every detected object.
+
+    Args:
+        images (list): Decoded images (DecodedImage or PIL) the objects were detected on
+        image_objects (list): Per image, the YOLO rows of its detected objects
+        registry (ModelRegistry): Registry providing the CLIP model
+        attribute_mode (str): "crop" encodes each object's crop, cut from the
+            image's higher-resolution `detail`, on its own; "roi" pools each
+            box out of one full-image pass. Defaults to ATTRIBUTE_MODE
+
+    Returns:
+        torch.Tensor: One row per object, in image then object order
+    """
+    attribute_mode = attribute_mode or config.ATTRIBUTE_MODE
+    images = [DecodedImage.load(image) for image in images]
+    if attribute_mode == "roi":
+        return registry.encode_image_regions(
+            [image.pil for image in images], [objects[:, :4] for objects in image_objects]
+        )
+    if attribute_mode != "crop":
+        raise ValueError(f"Unknown attribute mode: {attribute_mode}")
+
+    # Crop every detected object, then encode all crops in size-bounded batches
+    cropped_objects = [
+        image.crop_detail((x1, y1, x2, y2))
+        for image, objects in zip(images, image_objects)
+        for x1, y1, x2, y2, _, _ in objects
+    ]
+    return registry.encode_images(cropped_objects)
+
+
+def analyze_room_images(images, registry: ModelRegistry = None, tier: str = None):
+    """
+    Detect objects in several room images and classify their attributes.
+
+    YOLO runs once over all images and every object from every image is
+    encoded in the same batched CLIP pass.
+
+    Args:
+        images (list): Decoded images (DecodedImage or PIL)
+        registry (ModelRegistry): Registry providing the shared YOLO and CLIP models
+        tier (str): Detector tier to run, the registry's default if None
+
+    Returns:
+        list: The detected objects of each image, in input order
+    """
+    # Use the shared object detection model (YOLO) and style classification model (CLIP)
+    registry = registry or get_registry()
+    object_detector = registry.detector(tier)
+
+    # Detect objects in the images using YOLO
+    images = [DecodedImage.load(image) for image in images]
+    results = object_detector([image.pil for image in images])
+    # Extract bounding boxes and class information, keeping only the objects worth describing
+    image_objects = [
+        filter_detections(result.boxes.data.cpu().numpy(), result.names, image.size)
+        for image, result in zip(images, results)
+    ]
+
+    object_features = encode_objects(images, image_objects, registry)
+
+    # Find the best matching style, material, and color for all objects at once
+    object_attributes = iter(classify_object_attributes(object_features, registry))
+
+    # Store the detected objects and their attributes
+    all_detected_objects = []
+    for result, objects in zip(results, image_objects):
+        detected_objects = []
+        for obj in objects:
+            x1, y1, x2, y2, conf, class_id = obj
+            detected_objects.append({
+                "bounding_box": (x1, y1, x2, y2),
+                "confidence": conf,
+                "class_id": class_id,
+                "class_name": result.names[int(class_id)],  # Get the object name from YOLO
+                "attributes": next(object_attributes)
+            })
+
+        # Return the detected objects and their attributes
+        for obj in detected_objects:
+            print(f"Object ({obj['class_name']}): {obj['bounding_box']}, "
+                  f"Confidence: {obj['confidence']:.2f}, "
+                  f"Attributes: {obj['attributes']['description']}")
+        all_detected_objects.append(detected_objects)
+
+    return all_detected_objects
+
+
+def analyze_room_objects(image, registry: ModelRegistry = None, tier: str = None):
+    # Load the room image, unless it was already decoded
+    image = DecodedImage.load(image)
+    return analyze_room_images([image], registry, tier)[0]
 
 
 def create_room_from_analysis(detected_objects, room_style: RoomStyle, room_type: RoomType) -> Room:
@@ -97,7 +212,7 @@ def create_room_from_analysis(detected_objects, room_style: RoomStyle, room_type
     # Create detailed descriptions for each object
     object_descriptions = []
     for obj in detected_objects:
-        obj_desc = f"a {obj['attributes'].replace(' object in', '')} {obj['class_name']}"
+        obj_desc = f"a {obj['attributes']['description'].replace(' object in', '')} {obj['class_name']}"
         object_descriptions.append(obj_desc)
     
     description += ", ".join(object_descriptions)
@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from models.room import RoomStyle, RoomType
+
+if TYPE_CHECKING:
+    from inference_scheduler import InferenceScheduler
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+async def timed(awaitable: Awaitable[T]) -> Tuple[T, float]:
+    """Await `awaitable` and return its result with the elapsed time in milliseconds."""
+    start = time.perf_counter()
+    result = await awaitable
+    return result, round((time.perf_counter() - start) * 1000, 1)
+
+
+@dataclass
+class RoomAnalysis:
+    """Joined result of scene classification and object detection for one image."""
+    room_style: RoomStyle
+    room_type: RoomType
+    detected_objects: List[dict]
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+class RoomAnalysisPipeline:
+    """
+    Runs CLIP scene classification and YOLO object detection on the same
+    decoded image concurrently, then joins their results.
+    """
+
+    def __init__(self, scheduler: "InferenceScheduler"):
+        self.scheduler = scheduler
+
+    async def analyze(
+        self,
+        image,
+        on_scene: Optional[Callable[[RoomStyle, RoomType, float], None]] = None,
+        detector_tier: Optional[str] = None
+    ) -> RoomAnalysis:
+        """
+        Analyze one image.
+
+        Args:
+            image: DecodedImage; scene classification uses its model-sized `pil`,
+                object analysis also its `detail` for attribute crops
+            on_scene: Called with (room_style, room_type, elapsed ms) as soon as
+                scene classification finishes, while object detection may
+                still be running
+            detector_tier: Detector tier for object detection, the default if None
+
+        Returns:
+            RoomAnalysis: Joined scene and object results
+        """
+        start = time.perf_counter()
+
+        async def classify_scene():
+            scene, scene_ms = await timed(self.scheduler.classify_scene(image.pil))
+            if on_scene is not None:
+                on_scene(*scene, scene_ms)
+            return scene, scene_ms
+
+        (scene, scene_ms), (detected_objects, objects_ms) = await asyncio.gather(
+            classify_scene(),
+            timed(self.scheduler.analyze_objects(image, detector_tier))
+        )
+        room_style, room_type = scene
+
+        timings = {
+            "scene_classification_ms": scene_ms,
+            "object_detection_ms": objects_ms,
+            "analysis_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
+        logger.info(
+            f"Analysis timings: scene {scene_ms}ms, objects {objects_ms}ms, "
+            f"critical path {'objects' if objects_ms >= scene_ms else 'scene'}"
+        )
+        return RoomAnalysis(room_style, room_type, detected_objects, timings)
@@ -0,0 +1,281 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Dict, List, Optional, TypeVar, Union
+
+from analysis_cache import AnalysisResultCache, dhash
+from api.models.requests import AnalyzeResponse, BatchAnalyzeItem, SceneResponse
+from config import config
+from decoded_image import DecodedImage
+from detector_tiers import DetectorTierSelector
+from download_cache import DownloadCache, normalize_pin_key
+from http_client import HTTPClient
+from models.room import RoomStyle, RoomType
+from pinterest_utils import async_download_pinterest_image_bytes
+from services.room_analysis_pipeline import RoomAnalysisPipeline, timed
+from single_flight import SingleFlight
+
+if TYPE_CHECKING:
+    # Heavy imports (firebase_admin, torch) only needed for annotations
+    from firebase_operations.firebase_manager import FirebaseManager
+    from inference_executor import InferenceExecutor
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class PinDownloadError(Exception):
+    """Raised when the image behind a Pinterest URL cannot be downloaded."""
+
+
+@dataclass
+class StageLimits:
+    """Per-stage concurrency bounds for analyzing many pins at once."""
+    download: asyncio.Semaphore
+    decode: asyncio.Semaphore
+    analyze: asyncio.Semaphore
+    upload: asyncio.Semaphore
+
+    @classmethod
+    def from_config(cls) -> "StageLimits":
+        return cls(
+            download=asyncio.Semaphore(config.BATCH_DOWNLOAD_CONCURRENCY),
+            decode=asyncio.Semaphore(config.BATCH_DECODE_CONCURRENCY),
+            analyze=asyncio.Semaphore(config.BATCH_ANALYZE_CONCURRENCY),
+            upload=asyncio.Semaphore(config.BATCH_UPLOAD_CONCURRENCY)
+        )
+
+
+async def _in_stage(limits: Optional[StageLimits], stage: str, awaitable: Awaitable[T]) -> T:
+    """Await `awaitable` inside the concurrency bound for `stage`, if any."""
+    if limits is None:
+        return await awaitable
+    async with getattr(limits, stage):
+        return await awaitable
+
+
+class RoomAnalysisService:
+    """Downloads, analyzes and stores the room behind a Pinterest pin."""
+
+    def __init__(
+        self,
+        firebase_manager: "FirebaseManager",
+        http_client: HTTPClient,
+        executor: "InferenceExecutor",
+        pipeline: RoomAnalysisPipeline,
+        tier_selector: DetectorTierSelector,
+        download_cache: Optional[DownloadCache] = None,
+        analysis_cache: Optional[AnalysisResultCache] = None
+    ):
+        self.firebase_manager = firebase_manager
+        self.http_client = http_client
+        self.executor = executor
+        self.pipeline = pipeline
+        self.tier_selector = tier_selector
+        self.download_cache = download_cache
+        self.analysis_cache = analysis_cache
+        self.single_flight = SingleFlight()
+
+    async def analyze_pin(
+        self,
+        pinterest_url: str,
+        limits: Optional[StageLimits] = None,
+        detector_tier: Optional[str] = None,
+        latency_budget_ms: Optional[float] = None
+    ) -> AnalyzeResponse:
+        """
+        Analyze a Pinterest image and return room details.
+
+        Concurrent calls for the same pin and detector tier share one analysis,
+        so a viral pin produces a single Firestore room and storage blob.
+        The detector tier is the requested one, or is picked from the latency
+        budget and current queue depth.
+        """
+        tier = self.tier_selector.choose(detector_tier, latency_budget_ms)
+        return await self.single_flight.do(
+            f"{normalize_pin_key(pinterest_url)}@{tier}",
+            lambda: self._analyze_pin(pinterest_url, tier, limits)
+        )
+
+    async def analyze_pin_progressive(
+        self,
+        pinterest_url: str,
+        detector_tier: Optional[str] = None,
+        latency_budget_ms: Optional[float] = None
+    ) -> AsyncIterator[Union[SceneResponse, AnalyzeResponse]]:
+        """
+        Analyze a Pinterest image, yielding the scene classification first.
+
+        Yields a SceneResponse as soon as CLIP has classified the room, then the
+        full AnalyzeResponse once objects are detected and the room is stored.
+        A caller that joins an analysis already in flight, or hits the
+        analysis cache, gets both at once.
+        """
+        tier = self.tier_selector.choose(detector_tier, latency_budget_ms)
+        loop = asyncio.get_running_loop()
+        scene = loop.create_future()
+        stage_timings = {}
+
+        def on_scene(room_style: RoomStyle, room_type: RoomType, scene_ms: float):
+            if not scene.done():
+                scene.set_result(SceneResponse(
+                    room_style=room_style,
+                    room_type=room_type,
+                    timings={**stage_timings, "scene_classification_ms": scene_ms}
+                ))
+
+        room_task = asyncio.ensure_future(self.single_flight.do(
+            f"{normalize_pin_key(pinterest_url)}@{tier}",
+            lambda: self._analyze_pin(pinterest_url, tier, on_scene=on_scene, timings=stage_timings)
+        ))
+        try:
+            await asyncio.wait({scene, room_task}, return_when=asyncio.FIRST_COMPLETED)
+            if scene.done():
+                yield scene.result()
+            response = await room_task
+            if not scene.done():
+                yield SceneResponse(room_style=response.room.style, room_type=response.room.room_type)
+            yield response
+        finally:
+            # The shared analysis keeps running while other callers await it
+            room_task.cancel()
+
+    async def analyze_pins(
+        self,
+        pinterest_urls: List[str],
+        detector_tier: Optional[str] = None,
+        latency_budget_ms: Optional[float] = None
+    ) -> AsyncIterator[BatchAnalyzeItem]:
+        """
+        Analyze many Pinterest images, yielding each result as soon as it completes.
+
+        Pins move through download, decode, analysis and upload stages with
+        bounded concurrency per stage. Pins that reach analysis together are
+        micro-batched into shared CLIP and YOLO forwards. A pin that fails
+        yields an item with `error` set and does not affect the others.
+        """
+        limits = StageLimits.from_config()
+
+        async def analyze_item(index: int, pinterest_url: str) -> BatchAnalyzeItem:
+            try:
+                result = await self.analyze_pin(pinterest_url, limits, detector_tier, latency_budget_ms)
+                return BatchAnalyzeItem(index=index, pinterest_url=pinterest_url, result=result)
+            except Exception as e:
+                logger.error(f"Batch item {index} ({pinterest_url}) failed: {str(e)}")
+                return BatchAnalyzeItem(index=index, pinterest_url=pinterest_url, error=str(e))
+
+        tasks = [asyncio.ensure_future(analyze_item(i, url)) for i, url in enumerate(pinterest_urls)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Client went away: stop the pins that have not finished. A pin another
+            # request is also awaiting keeps running for it (see SingleFlight)
+            for task in tasks:
+                task.cancel()
+
+    async def _analyze_pin(
+        self,
+        pinterest_url: str,
+        detector_tier: str,
+        limits: Optional[StageLimits] = None,
+        on_scene: Optional[Callable[[RoomStyle, RoomType, float], None]] = None,
+        timings: Optional[Dict[str, float]] = None
+    ) -> AnalyzeResponse:
+        timings = {} if timings is None else timings
+
+        # 1. Download image into memory
+        logger.info(f"Downloading image from {pinterest_url}")
+        image_bytes, download_ms = await _in_stage(limits, "download", timed(async_download_pinterest_image_bytes(
+            pinterest_url,
+            self.http_client,
+            self.download_cache
+        )))
+        if not image_bytes:
+            raise PinDownloadError("Failed to download Pinterest image")
+        timings["download_ms"] = download_ms
+
+        image, timings["decode_ms"] = await _in_stage(limits, "decode", timed(
+            self.executor.run(DecodedImage.from_bytes, image_bytes)
+        ))
+
+        # 2. Near-duplicate of an already analyzed image: reuse its stored result
+        if self.analysis_cache is not None:
+            # Hashing shrinks the image, which is CPU work; keep it off the event loop
+            image_hash = await asyncio.to_thread(dhash, image.pil)
+            try:
+                cached_response = await asyncio.to_thread(self.analysis_cache.lookup, image_hash, detector_tier)
+            except Exception as e:
+                # A broken cache only costs the analysis
+                logger.error(f"Analysis cache lookup failed: {str(e)}")
+                cached_response = None
+            if cached_response is not None:
+                response = AnalyzeResponse.model_validate(cached_response)
+                response.timings = dict(timings)
+                response.cached = True
+                return response
+
+        # 3. Analyze room: scene classification and object detection run concurrently
+        analysis = await _in_stage(limits, "analyze", self.pipeline.analyze(
+            image,
+            on_scene=on_scene,
+            detector_tier=detector_tier
+        ))
+        timings = {**timings, **analysis.timings}
+
+        # 4. Clean detected objects (convert numpy types to Python types)
+        cleaned_objects = []
+        for obj in analysis.detected_objects:
+            cleaned_obj = {
+                "class_name": obj["class_name"],
+                "confidence": float(obj["confidence"]),
+                "coordinates": list(image.to_source_coordinates(obj["bounding_box"])),
+                "attributes": obj["attributes"]
+            }
+            cleaned_objects.append(cleaned_obj)
+
+        # 5. Create room object
+        from room_object_analysis import create_room_from_analysis  # Imports torch, already loaded by now
+        room = create_room_from_analysis(
+            cleaned_objects,
+            analysis.room_style,
+            analysis.room_type
+        )
+
+        # 6. Upload to Firebase
+        upload_result, timings["upload_ms"] = await _in_stage(limits, "upload", timed(
+            self.firebase_manager.upload_room_bytes(
+                image_bytes=image_bytes,
+                metadata=room.dict(),
+                content_type=image.mime_type
+            )
+        ))
+        doc_id, public_url = upload_result
+
+        # 7. Update room with ID and URL
+        room.id = doc_id
+        room.image_url = public_url
+
+        response = AnalyzeResponse(
+            room=room,
+            public_url=public_url,
+            detected_objects=cleaned_objects,
+            detector_tier=detector_tier,
+            timings=timings
+        )
+        if self.analysis_cache is not None:
+            try:
+                await asyncio.to_thread(
+                    self.analysis_cache.store,
+                    image_hash,
+                    detector_tier,
+                    response.model_dump(mode="json", exclude={"timings", "cached"})
+                )
+            except Exception as e:
+                # The room is already stored and uploaded; only later near-duplicates miss out
+                logger.error(f"Failed to store the analysis in the cache: {str(e)}")
+        return response
+
+    def stats(self) -> dict:
+        return {"coalescing": self.single_flight.stats()}
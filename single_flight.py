@@ -0,0 +1,76 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _Flight:
+    """A shared execution and the number of callers still awaiting it."""
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into a single execution.
+
+    The first caller for a key starts the work; callers that arrive while it
+    is still running await the same result (or exception) instead of
+    repeating it. A caller that disconnects does not cancel the shared work
+    for the others, but once every caller has gone away the work is
+    cancelled, since nobody is left to receive its result.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, _Flight] = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        flight = self._in_flight.get(key)
+        if flight is not None:
+            self.coalesced += 1
+            logger.info(f"Coalescing request for {key} with one already in flight")
+        else:
+            self.executions += 1
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._in_flight[key] = flight
+            flight.task.add_done_callback(lambda done: self._finish(key, flight))
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # The last caller was cancelled: nobody is left to receive the result.
+                # Forget the key right away so a new caller starts fresh work.
+                self.abandoned += 1
+                logger.info(f"Cancelling {key}: every caller went away")
+                self._release(key, flight)
+                flight.task.cancel()
+
+    def _release(self, key: str, flight: _Flight):
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+
+    def _finish(self, key: str, flight: _Flight):
+        self._release(key, flight)
+        # Mark the exception as retrieved even if every caller went away
+        task = flight.task
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Shared call for {key} failed: {task.exception()}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._in_flight),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "abandoned": self.abandoned,
+        }
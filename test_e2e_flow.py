@@ -8,6 +8,7 @@ from pinterest_utils import download_pinterest_image
 from stable_diffusion.img2img_service import StableDiffusionImg2Img
 from stable_diffusion.text2img_service import StableDiffusionText2Img
 from clip import get_clip_embeddings
+from decoded_image import DecodedImage
 from room_object_analysis import analyze_room_objects, create_room_from_analysis
 from visualize_objects import draw_bounding_boxes
 from services.similar_images_service import SimilarImagesService
@@ -67,10 +68,11 @@ async def async_main():
         download_result = download_pinterest_image(pinterest_url, image_path)
         logger.info("Image downloaded successfully.")
 
-        # Step 3: Analyze Room Objects
-        room_style, room_type = get_clip_embeddings(image_path)
-        detected_objects = analyze_room_objects(image_path)
-        draw_bounding_boxes(image_path, detected_objects)
+        # Step 3: Analyze Room Objects (decode the image once for every consumer)
+        image = DecodedImage.from_path(image_path)
+        room_style, room_type = get_clip_embeddings(image)
+        detected_objects = analyze_room_objects(image)
+        draw_bounding_boxes(image, detected_objects)
         room = create_room_from_analysis(detected_objects, room_style, room_type)
         print("Room: ", room)
 
@@ -0,0 +1,95 @@
+"""
+Output parity of the exported models (export_models.py) with the PyTorch path.
+
+Run with pytest after exporting. `python test_exported_models.py` also prints
+a per-image latency comparison of the two runtimes.
+"""
+import statistics
+import time
+
+import numpy as np
+import pytest
+import torch
+
+from benchmark_support import reference_image_paths
+from clip import ROOM_TYPE_PROMPTS, classify_room_images
+from decoded_image import DecodedImage
+from exported_models import load_manifest
+from model_registry import ModelRegistry
+from room_object_analysis import filter_detections
+
+pytestmark = pytest.mark.skipif(load_manifest() is None, reason="run export_models.py first")
+
+
+@pytest.fixture(scope="module")
+def registries():
+    return ModelRegistry(runtime="pytorch").load(), ModelRegistry(runtime="exported").load()
+
+
+@pytest.fixture(scope="module")
+def images():
+    return [DecodedImage.from_path(path).pil for path in reference_image_paths()]
+
+
+def test_image_embeddings_match(registries, images):
+    pytorch, exported = registries
+    similarity = (pytorch.encode_images(images) * exported.encode_images(images)).sum(dim=-1)
+    assert torch.all(similarity > 0.999)
+
+
+def test_text_embeddings_match(registries):
+    pytorch, exported = registries
+    expected, actual = pytorch._encode_texts(ROOM_TYPE_PROMPTS), exported._encode_texts(ROOM_TYPE_PROMPTS)
+    similarity = torch.nn.functional.cosine_similarity(expected, actual, dim=-1)
+    assert torch.all(similarity > 0.999)
+
+
+def test_region_embeddings_match(registries, images):
+    pytorch, exported = registries
+    boxes = [np.array([[0, 0, image.width, image.height], [10, 20, 200, 240]]) for image in images]
+    expected, actual = pytorch.encode_image_regions(images, boxes), exported.encode_image_regions(images, boxes)
+    similarity = (expected * actual).sum(dim=-1)
+    assert torch.all(similarity > 0.999)
+
+
+def test_room_classification_matches(registries, images):
+    pytorch, exported = registries
+    assert classify_room_images(images, exported) == classify_room_images(images, pytorch)
+
+
+def test_detections_match(registries, images):
+    pytorch, exported = registries
+    for image in images:
+        expected, actual = [
+            filter_detections(result.boxes.data.cpu().numpy(), result.names, image.size)
+            for result in (registry.yolo(image, verbose=False)[0] for registry in (pytorch, exported))
+        ]
+        assert len(actual) == len(expected)
+        assert (actual[:, 5] == expected[:, 5]).all()
+        assert abs(actual[:, :4] - expected[:, :4]).max() < 2.0  # pixels
+
+
+def _median_ms(fn, repeats: int = 10) -> float:
+    fn()  # Warmup
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+if __name__ == "__main__":
+    runtimes = {
+        "pytorch": ModelRegistry(runtime="pytorch").load(),
+        "exported": ModelRegistry(runtime="exported").load(),
+    }
+    print(f"{'image':<28} {'stage':<6} " + " ".join(f"{name:>10}" for name in runtimes))
+    for path in reference_image_paths():
+        image = DecodedImage.from_path(path).pil
+        for stage, run in [
+            ("clip", lambda registry: registry.encode_images([image])),
+            ("yolo", lambda registry: registry.yolo(image, verbose=False)),
+        ]:
+            timings = [_median_ms(lambda: run(registry)) for registry in runtimes.values()]
+            print(f"{path:<28} {stage:<6} " + " ".join(f"{ms:>7.1f} ms" for ms in timings))
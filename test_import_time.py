@@ -0,0 +1,45 @@
+"""
+Startup budget: importing the app must stay fast and must not load the models' dependencies.
+
+Models and clients are loaded in the background after the server starts
+(see `initialize` in main.py and the /ready endpoint). Override the budget
+with IMPORT_TIME_BUDGET_SECONDS on slow machines.
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+IMPORT_TIME_BUDGET_SECONDS = float(os.getenv("IMPORT_TIME_BUDGET_SECONDS", "2.0"))
+HEAVY_MODULES = ["torch", "transformers", "ultralytics", "firebase_admin", "bs4"]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def _import_stats(module: str) -> dict:
+    # A fresh interpreter per probe, so nothing is already imported
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        cwd=Path(__file__).parent, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("module", ["main", "visualize_objects"])
+def test_import_does_not_load_heavy_dependencies(module):
+    assert _import_stats(module)["heavy"] == []
+
+
+def test_app_import_within_budget():
+    # Best of three, to ignore a cold disk cache
+    seconds = min(_import_stats("main")["seconds"] for _ in range(3))
+    assert seconds < IMPORT_TIME_BUDGET_SECONDS, f"importing main took {seconds:.2f}s"
@@ -0,0 +1,44 @@
+import asyncio
+
+from inference_executor import InferenceExecutor
+from inference_scheduler import MicroBatcher
+
+
+def _double(items):
+    if any(item is None for item in items):
+        raise ValueError("malformed item")
+    return [item * 2 for item in items]
+
+
+async def _submit_together(batcher, items):
+    try:
+        return await asyncio.gather(*(batcher.submit(item) for item in items), return_exceptions=True)
+    finally:
+        await batcher.close()
+
+
+def test_bad_item_only_fails_its_own_caller():
+    executor = InferenceExecutor("thread", workers=1)
+    # Long wait, so both items are flushed as one batch
+    batcher = MicroBatcher("test", _double, executor, max_batch_size=2, max_wait_ms=1000)
+    try:
+        good, bad = asyncio.run(_submit_together(batcher, [21, None]))
+    finally:
+        executor.shutdown()
+
+    assert good == 42
+    assert isinstance(bad, ValueError)
+    assert batcher.batch_size_histogram[2] == 1
+    assert batcher.failed_batches == 1
+
+
+def test_single_item_batch_failure_is_raised():
+    executor = InferenceExecutor("thread", workers=1)
+    batcher = MicroBatcher("test", _double, executor, max_batch_size=1, max_wait_ms=0)
+    try:
+        result, = asyncio.run(_submit_together(batcher, [None]))
+    finally:
+        executor.shutdown()
+
+    assert isinstance(result, ValueError)
+    assert batcher.failed_batches == 0
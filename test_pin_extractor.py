@@ -0,0 +1,80 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from config import config
+from pin_extractor import PinPageScanner, extract_image_url_from_html, pin_image_target_side, select_image_variant
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "pin_pages"
+# Real pin pages saved by capture_pin_pages.py; sources.json records where and
+# when each was captured and the (checked) image URL to expect from it
+CAPTURED_DIR = FIXTURES_DIR / "captured"
+CAPTURED = json.loads((CAPTURED_DIR / "sources.json").read_text())
+# Hand-written pages for markup variants real pages may not show: attribute
+# order, pin JSON without og:image, the <img> fallback and a page without an image
+SYNTHETIC_DIR = FIXTURES_DIR / "synthetic"
+SYNTHETIC = json.loads((SYNTHETIC_DIR / "expected.json").read_text())
+TARGET_SIDE = 640
+
+
+def _scan_streamed(html: str, target_side: int):
+    scanner = PinPageScanner(target_side)
+    for start in range(0, len(html), 64):
+        image_url = scanner.feed(html[start:start + 64])
+        if image_url:
+            return image_url
+    return scanner.finish()
+
+
+@pytest.mark.parametrize("page_name", sorted(CAPTURED))
+def test_extracts_image_from_captured_page(page_name):
+    source = CAPTURED[page_name]
+    html = (CAPTURED_DIR / page_name).read_text()
+    assert extract_image_url_from_html(html, source["target_side"]) == source["image_url"]
+
+
+@pytest.mark.parametrize("page_name", sorted(CAPTURED))
+def test_streamed_captured_page_matches_whole_page(page_name):
+    source = CAPTURED[page_name]
+    html = (CAPTURED_DIR / page_name).read_text()
+    assert _scan_streamed(html, source["target_side"]) == source["image_url"]
+
+
+@pytest.mark.parametrize("page_name", sorted(SYNTHETIC))
+def test_extracts_expected_image(page_name):
+    html = (SYNTHETIC_DIR / page_name).read_text()
+    assert extract_image_url_from_html(html, TARGET_SIDE) == SYNTHETIC[page_name]
+
+
+@pytest.mark.parametrize("page_name", sorted(SYNTHETIC))
+def test_streamed_chunks_match_whole_page(page_name):
+    html = (SYNTHETIC_DIR / page_name).read_text()
+    assert _scan_streamed(html, TARGET_SIDE) == SYNTHETIC[page_name]
+
+
+@pytest.mark.parametrize("page_name", sorted(SYNTHETIC))
+def test_production_target_picks_the_model_input_variant(page_name, monkeypatch):
+    # Crop mode decodes up to ATTRIBUTE_CROP_MAX_SIDE, which must not pull in the originals
+    monkeypatch.setattr(config, "ATTRIBUTE_MODE", "crop")
+    monkeypatch.setattr(config, "PIN_IMAGE_TARGET_SIDE", 0)
+    monkeypatch.setattr(config, "IMAGE_DECODE_MAX_SIDE", TARGET_SIDE)
+    html = (SYNTHETIC_DIR / page_name).read_text()
+    assert extract_image_url_from_html(html, pin_image_target_side()) == SYNTHETIC[page_name]
+
+
+def test_stops_before_end_of_page_once_og_image_is_seen():
+    html = (SYNTHETIC_DIR / "og_image_meta.html").read_text()
+    head = html[:html.index("</head>")]
+    assert PinPageScanner(TARGET_SIDE).feed(head) is not None
+
+
+@pytest.mark.parametrize("target_side, expected_segment", [(200, "236x"), (640, "736x"), (5000, "1200x")])
+def test_select_image_variant(target_side, expected_segment):
+    url = "https://i.pinimg.com/236x/aa/bb/cc/abc.jpg"
+    assert select_image_variant(url, target_side) == f"https://i.pinimg.com/{expected_segment}/aa/bb/cc/abc.jpg"
+
+
+def test_select_image_variant_leaves_other_hosts_alone():
+    url = "https://example.com/236x/room.jpg"
+    assert select_image_variant(url, TARGET_SIDE) == url
@@ -0,0 +1,50 @@
+import asyncio
+
+from single_flight import SingleFlight
+
+
+async def _work(started: asyncio.Event, release: asyncio.Event, outcome: dict):
+    started.set()
+    try:
+        await release.wait()
+    except asyncio.CancelledError:
+        outcome["cancelled"] = True
+        raise
+    return "result"
+
+
+def test_shared_work_survives_one_caller_leaving():
+    async def scenario():
+        flight, started, release, outcome = SingleFlight(), asyncio.Event(), asyncio.Event(), {}
+        first = asyncio.ensure_future(flight.do("pin", lambda: _work(started, release, outcome)))
+        second = asyncio.ensure_future(flight.do("pin", lambda: _work(started, release, outcome)))
+        await started.wait()
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return await second, outcome, flight.stats()
+
+    result, outcome, stats = asyncio.run(scenario())
+    assert result == "result"
+    assert "cancelled" not in outcome
+    assert stats["executions"] == 1 and stats["abandoned"] == 0
+
+
+def test_work_is_cancelled_once_every_caller_leaves():
+    async def scenario():
+        flight, started, release, outcome = SingleFlight(), asyncio.Event(), asyncio.Event(), {}
+        callers = [asyncio.ensure_future(flight.do("pin", lambda: _work(started, release, outcome))) for _ in range(2)]
+        await started.wait()
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+        # A new caller for the same key starts fresh work
+        release.set()
+        result = await flight.do("pin", lambda: _work(asyncio.Event(), release, {}))
+        return result, outcome, flight.stats()
+
+    result, outcome, stats = asyncio.run(scenario())
+    assert outcome == {"cancelled": True}
+    assert result == "result"
+    assert stats == {"in_flight": 0, "executions": 2, "coalesced": 1, "abandoned": 1}
@@ -0,0 +1,71 @@
+import hashlib
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+import torch
+
+logger = logging.getLogger(__name__)
+
+
+class TextEmbeddingBank:
+    """
+    Normalized CLIP text embeddings for fixed prompt lists.
+
+    Each matrix is keyed by model name plus a hash of its prompts and persisted
+    as a `.npy` file, so the text tower runs once per prompt list rather than
+    once per request. Files are memory-mapped back in, which lets every worker
+    on a node share the same pages.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = Path(cache_dir)
+        self._matrices: Dict[str, torch.Tensor] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model_name: str, prompts: List[str]) -> str:
+        """Build the cache key for a model and prompt list."""
+        digest = hashlib.sha256("\n".join(prompts).encode("utf-8")).hexdigest()[:16]
+        return f"{model_name.replace('/', '__')}-{digest}"
+
+    def get(
+        self,
+        model_name: str,
+        prompts: List[str],
+        encode: Callable[[List[str]], torch.Tensor]
+    ) -> torch.Tensor:
+        """
+        Return the normalized embedding matrix for `prompts`, computing it with
+        `encode` only if it is neither in memory nor on disk.
+        """
+        key = self.key(model_name, prompts)
+        matrix = self._matrices.get(key)
+        if matrix is not None:
+            return matrix
+
+        with self._lock:
+            if key in self._matrices:
+                return self._matrices[key]
+
+            path = self.cache_dir / f"{key}.npy"
+            if not path.exists():
+                logger.info(f"Encoding {len(prompts)} prompts for text embedding bank {key}")
+                features = encode(prompts)
+                features = features / features.norm(dim=-1, keepdim=True)
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                # Write to a temporary file first so concurrent workers never read a partial matrix
+                tmp_path = path.with_name(f"{key}.{os.getpid()}.tmp.npy")
+                np.save(tmp_path, features.float().cpu().numpy())
+                os.replace(tmp_path, path)
+
+            # Copy-on-write mapping: pages stay shared unless something writes to them
+            array = np.load(path, mmap_mode="c")
+            if array.shape[0] != len(prompts):
+                raise ValueError(f"Text embedding bank {path} has {array.shape[0]} rows, expected {len(prompts)}")
+            matrix = torch.from_numpy(array)
+            self._matrices[key] = matrix
+            return matrix
@@ -1,13 +1,167 @@
+from functools import lru_cache
+
 from PIL import Image, ImageDraw, ImageFont
-from colorthief import ColorThief
-from ultralytics import YOLO
 import numpy as np
 import webcolors
+from decoded_image import DecodedImage
+
+
+# Histogram bits per channel and palette size, as ColorThief's get_color uses them
+QUANTIZE_BITS = 5
+PALETTE_SIZE = 5
+# Like ColorThief, near-white pixels (background, highlights) are ignored
+WHITE_THRESHOLD = 250
+_MAX_CUTS = 1000
+
+
+def _box_count(histogram, low, high):
+    return int(histogram[low[0]:high[0] + 1, low[1]:high[1] + 1, low[2]:high[2] + 1].sum())
+
+
+def _box_volume(low, high):
+    return int(np.prod(high - low + 1))
+
+
+def _median_cut_apply(histogram, low, high):
+    """Split a color box at the median of its widest channel; the second half is None if it can't be split."""
+    count = _box_count(histogram, low, high)
+    if count == 1:
+        return (low, high), None
+    axis = int(np.argmax(high - low))
+    region = histogram[low[0]:high[0] + 1, low[1]:high[1] + 1, low[2]:high[2] + 1]
+    partial = np.cumsum(region.sum(axis=tuple(a for a in range(3) if a != axis)))
+    total = int(partial[-1])
+    first, last = int(low[axis]), int(high[axis])
+    partial_at = lambda i: int(partial[i - first]) if first <= i <= last else 0
+    lookahead_at = lambda i: total - int(partial[i - first]) if first <= i <= last else None
+
+    i = first + int(np.argmax(partial > total / 2))
+    left, right = i - first, last - i
+    cut = min(last - 1, int(i + right / 2)) if left <= right else max(first, int(i - 1 - left / 2))
+    # Avoid empty boxes
+    while not partial_at(cut):
+        cut += 1
+    while not lookahead_at(cut) and partial_at(cut - 1):
+        cut -= 1
+
+    high1, low2 = high.copy(), low.copy()
+    high1[axis], low2[axis] = cut, cut + 1
+    return (low, high1), (low2, high)
+
+
+def _median_cut_color(histogram, palette_size=PALETTE_SIZE):
+    """
+    Dominant color of a quantized color histogram by modified median cut, as ColorThief computes it.
+
+    Boxes are first split by population, then by population times volume;
+    the dominant color is the mean of the box with the largest product.
+    """
+    occupied = np.nonzero(histogram)
+    boxes = [(np.array([axis.min() for axis in occupied]), np.array([axis.max() for axis in occupied]))]
+
+    def split(key, target):
+        colors = 1
+        for _ in range(_MAX_CUTS):
+            # Stable sort and pop the last, like ColorThief's priority queue
+            boxes.sort(key=key)
+            box = boxes.pop()
+            if not _box_count(histogram, *box):
+                boxes.append(box)
+                continue
+            first, second = _median_cut_apply(histogram, *box)
+            boxes.append(first)
+            if second is not None:
+                boxes.append(second)
+                colors += 1
+            if colors >= target:
+                return
+
+    population = lambda box: _box_count(histogram, *box)
+    weight = lambda box: _box_count(histogram, *box) * _box_volume(*box)
+    split(population, 0.75 * palette_size)
+    # Moving the boxes to the second queue pops them largest first
+    boxes.sort(key=population)
+    boxes.reverse()
+    split(weight, palette_size - len(boxes))
+
+    low, high = sorted(boxes, key=weight)[-1]
+    region = histogram[low[0]:high[0] + 1, low[1]:high[1] + 1, low[2]:high[2] + 1]
+    scale = 1 << (8 - QUANTIZE_BITS)
+    total = region.sum()
+    if not total:
+        return tuple(int(scale * (lo + hi + 1) / 2) for lo, hi in zip(low, high))
+    # Mean of the bin centers, weighted by their pixel counts
+    color = []
+    for axis in range(3):
+        centers = (np.arange(low[axis], high[axis] + 1) + 0.5) * scale
+        counts = region.sum(axis=tuple(a for a in range(3) if a != axis))
+        color.append(int((counts * centers).sum() / total))
+    return tuple(color)
+
+
+def dominant_colors(image, boxes):
+    """
+    Detect the dominant color inside each box of an image, in memory.
+
+    The pixels of all boxes are quantized and counted into per-box color
+    histograms in one vectorized pass; each histogram is then reduced to its
+    dominant color by median cut, matching ColorThief's `get_color(quality=1)`.
+
+    Args:
+        image (PIL.Image.Image or np.ndarray): The image, or an HxWx3 uint8 RGB array.
+        boxes (list): Bounding boxes as (x1, y1, x2, y2) in pixels.
+
+    Returns:
+        list: One (R, G, B) tuple per box.
+    """
+    if isinstance(image, Image.Image):
+        image = image.convert("RGB")
+    pixels = np.asarray(image, dtype=np.uint8)
+    if not len(boxes):
+        return []
+
+    height, width = pixels.shape[:2]
+    bits = QUANTIZE_BITS
+    bins = 1 << (3 * bits)
+    quantized = pixels.astype(np.int64) >> (8 - bits)
+    codes = (quantized[..., 0] << (2 * bits)) | (quantized[..., 1] << bits) | quantized[..., 2]
+    keep = (pixels <= WHITE_THRESHOLD).any(axis=-1)
+
+    box_codes = []
+    for index, box in enumerate(boxes):
+        x1, y1, x2, y2 = (int(float(v)) for v in box[:4])
+        x1, y1 = min(max(x1, 0), width - 1), min(max(y1, 0), height - 1)
+        x2, y2 = min(max(x2, x1 + 1), width), min(max(y2, y1 + 1), height)
+        region_codes = codes[y1:y2, x1:x2].ravel()
+        region_keep = keep[y1:y2, x1:x2].ravel()
+        if region_keep.any():
+            region_codes = region_codes[region_keep]
+        # Offset each box into its own slice of one shared histogram
+        box_codes.append(region_codes + index * bins)
+
+    side = 1 << bits
+    histograms = np.bincount(np.concatenate(box_codes), minlength=len(boxes) * bins)
+    histograms = histograms.reshape(len(boxes), side, side, side)
+    return [_median_cut_color(histogram) for histogram in histograms]
+
+
+def dominant_color_names(image, boxes):
+    """
+    Detect the dominant color inside each box of an image and map it to the closest CSS color name.
+
+    Args:
+        image (PIL.Image.Image or np.ndarray): The image the boxes refer to.
+        boxes (list): Bounding boxes as (x1, y1, x2, y2) in pixels.
+
+    Returns:
+        list: One CSS color name per box.
+    """
+    return closest_css_colors(dominant_colors(image, boxes))
 
 
 def detect_dominant_color(cropped_object):
     """
-    Detect the dominant color in a cropped image using ColorThief and map it to the closest CSS color name.
+    Detect the dominant color in a cropped image and map it to the closest CSS color name.
 
     Args:
         cropped_object (PIL.Image.Image): The cropped object image.
@@ -15,22 +169,32 @@ def detect_dominant_color(cropped_object):
     Returns:
         str: The name of the closest CSS color.
     """
-    # Save the cropped image to a temporary file
-    cropped_object.save("temp_cropped.jpg")
+    width, height = cropped_object.size
+    return dominant_color_names(cropped_object, [(0, 0, width, height)])[0]
 
-    # Use ColorThief to get the dominant color
-    from colorthief import ColorThief
-    color_thief = ColorThief("temp_cropped.jpg")
-    dominant_color = color_thief.get_color(quality=1)  # Returns (R, G, B)
 
-    # Find the closest CSS3 color name
-    try:
-        color_name = webcolors.rgb_to_name(dominant_color)
-    except ValueError:
-        # If an exact match is not found, find the closest color
-        color_name = closest_css_color(dominant_color)
+@lru_cache(maxsize=1)
+def _css3_palette():
+    names = webcolors.names("css3")
+    return names, np.array([tuple(webcolors.name_to_rgb(name)) for name in names], dtype=np.int64)
 
-    return color_name
+
+def closest_css_colors(requested_colors):
+    """
+    Find the closest CSS3 color name for each of several RGB values.
+
+    Args:
+        requested_colors (list): RGB tuples (R, G, B).
+
+    Returns:
+        list: The name of the closest CSS3 color for each.
+    """
+    if not len(requested_colors):
+        return []
+    names, palette = _css3_palette()
+    # Squared Euclidean distance from every requested color to every CSS3 color
+    distances = ((np.asarray(requested_colors, dtype=np.int64)[:, None, :] - palette[None]) ** 2).sum(axis=-1)
+    return [names[i] for i in distances.argmin(axis=1)]
 
 
 def closest_css_color(requested_color):
@@ -43,38 +207,21 @@ def closest_css_color(requested_color):
     Returns:
         str: The name of the closest CSS3 color.
     """
-    # Get the list of all CSS3 color names
-    css3_names = webcolors.names("css3")
+    return closest_css_colors([requested_color])[0]
 
-    min_distance = float('inf')
-    closest_color_name = None
 
-    for color_name in css3_names:
-        rgb_value = webcolors.name_to_rgb(color_name)
-        # Calculate Euclidean distance between the requested color and CSS3 colors
-        distance = ((rgb_value.red - requested_color[0]) ** 2 +
-                    (rgb_value.green - requested_color[1]) ** 2 +
-                    (rgb_value.blue - requested_color[2]) ** 2)
-
-        if distance < min_distance:
-            min_distance = distance
-            closest_color_name = color_name
-
-    return closest_color_name
-
-
-
-def draw_bounding_boxes(image_path, detected_objects, output_path="output_image.jpg"):
+def draw_bounding_boxes(image, detected_objects, output_path="output_image.jpg"):
     """
     Draw bounding boxes and labels on the image with detected colors.
 
     Args:
-        image_path (str): Path to the input image.
+        image (str or DecodedImage): Path to the input image, or the image the objects were detected on.
         detected_objects (list): List of detected objects with bounding boxes and attributes.
         output_path (str): Path to save the output image with bounding boxes.
     """
-    # Load the image
-    image = Image.open(image_path).convert("RGB")
+    # Load the image, unless it was already decoded
+    decoded = DecodedImage.load(image)
+    image = decoded.pil.copy()
     draw = ImageDraw.Draw(image)
 
     # Optional: Load a font for better text rendering
@@ -83,14 +230,15 @@ def draw_bounding_boxes(image_path, detected_objects, output_path="output_image.
     except IOError:
         font = ImageFont.load_default()
 
+    # Dominant colors of all objects at once, from the undrawn image
+    colors = dominant_color_names(decoded.pil, [obj["bounding_box"] for obj in detected_objects])
+
     # Draw each object's bounding box and label
     print("###")
-    for obj in detected_objects:
+    for obj, color in zip(detected_objects, colors):
         x1, y1, x2, y2 = obj["bounding_box"]
-        cropped_object = image.crop((x1, y1, x2, y2))
-        color = detect_dominant_color(cropped_object)
 
-        label = f"{obj['class_name']}: {obj['attributes']} (Conf: {obj['confidence']:.2f}, Color: {color})"
+        label = f"{obj['class_name']}: {obj['attributes']['description']} (Conf: {obj['confidence']:.2f}, Color: {color})"
         print(label)
         # Draw bounding box
         draw.rectangle([(x1, y1), (x2, y2)], outline="red", width=3)